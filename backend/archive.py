@@ -0,0 +1,284 @@
+"""Columnar archive of historical articles.
+
+Each day is a directory under output/archive/ holding one file per column
+plus a small meta.json. Rows are grouped by topic and meta.json records each
+topic's row range, so a query opens only the days and columns it asks for and
+slices only the rows of the topics it wants. Column files are memory-mapped.
+
+Column file layout (little-endian):
+    8 bytes   magic b"CURVCOL1"
+    4 bytes   row count n
+    8*(n+1)   uint64 offsets into the data section
+    ...       UTF-8 data, row i is data[offsets[i]:offsets[i+1]]
+
+    python archive.py convert                 # import public/data, output dumps and the article store
+    python archive.py query --start 2025-04-01 --end 2025-04-10 --topic tech --columns headline
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import config
+import schemas
+from day_index import PUBLIC_DATA_DIR, day_paths
+
+ARCHIVE_DIR = os.path.join('output', 'archive')
+COLUMNS = ("id", "headline", "text", "sources")
+MAGIC = b"CURVCOL1"
+HEADER = struct.Struct("<8sI")
+SOURCES_SEPARATOR = "\n"
+
+
+def _offsets_to_bytes(offsets: array) -> bytes:
+    if sys.byteorder != "little":
+        offsets = array("Q", offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def write_column(path: str, values: Sequence[str]):
+    """Write one string column"""
+    offsets = array("Q", [0])
+    encoded = []
+    position = 0
+    for value in values:
+        data = value.encode('utf-8')
+        encoded.append(data)
+        position += len(data)
+        offsets.append(position)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(values)))
+        f.write(_offsets_to_bytes(offsets))
+        for data in encoded:
+            f.write(data)
+
+
+class Column:
+    """Memory-mapped read access to one column file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an archive column")
+        offsets_end = HEADER.size + 8 * (self.rows + 1)
+        self._offsets = memoryview(self._map)[HEADER.size:offsets_end].cast("Q")
+        self._data_start = offsets_end
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _offset(self, i: int) -> int:
+        value = self._offsets[i]
+        if sys.byteorder != "little":
+            value = int.from_bytes(value.to_bytes(8, "little"), "big")
+        return value
+
+    def __getitem__(self, i: int) -> str:
+        start = self._data_start + self._offset(i)
+        end = self._data_start + self._offset(i + 1)
+        return self._map[start:end].decode('utf-8')
+
+    def close(self):
+        self._offsets.release()
+        self._map.close()
+        self._file.close()
+
+
+def _article_id(topic: str, headline: str, date: str, sources: Sequence[str]) -> str:
+    # Day file items carry no id; sources tell apart different stories sharing a headline
+    return hashlib.md5("\n".join([topic, headline, date, *sources]).encode()).hexdigest()
+
+
+def write_day(date: str, topics: Dict[str, Dict], directory: str = ARCHIVE_DIR):
+    """Write one day's partition from {topic: {"emoji": ..., "articles": [...]}}"""
+    columns = {name: [] for name in COLUMNS}
+    meta = {"date": date, "rows": 0, "columns": list(COLUMNS), "topics": {}}
+    for topic in sorted(topics):
+        start = len(columns["id"])
+        for article in topics[topic]["articles"]:
+            columns["id"].append(article.get("id") or _article_id(topic, article["headline"], date,
+                                                                  article.get("sources", [])))
+            columns["headline"].append(article["headline"])
+            columns["text"].append(article.get("text", ""))
+            columns["sources"].append(SOURCES_SEPARATOR.join(article.get("sources", [])))
+        meta["topics"][topic] = {"emoji": topics[topic].get("emoji", ""), "start": start, "end": len(columns["id"])}
+    meta["rows"] = len(columns["id"])
+
+    # Build the partition beside the live one and swap it in
+    os.makedirs(directory, exist_ok=True)
+    final_dir = os.path.join(directory, date)
+    tmp_dir = f"{final_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, values in columns.items():
+        write_column(os.path.join(tmp_dir, f"{name}.col"), values)
+    with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    old_dir = f"{final_dir}.old"
+    if os.path.exists(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class ArchiveReader:
+    """Query the archive by date range, topic and column"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+
+    def dates(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name, "meta.json"))
+        )
+
+    def meta(self, date: str) -> Dict:
+        with open(os.path.join(self.directory, date, "meta.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def scan(self, start: Optional[str] = None, end: Optional[str] = None,
+             topic: Optional[str] = None, columns: Iterable[str] = ("headline",)) -> Iterator[Dict]:
+        """Yield rows with only the requested columns, touching only matching days and topics"""
+        columns = list(columns)
+        unknown = [name for name in columns if name not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+        for date in self.dates():
+            if (start and date < start) or (end and date > end):
+                continue
+            meta = self.meta(date)
+            ranges = [
+                (name, info) for name, info in meta["topics"].items()
+                if (topic is None or name == topic) and info["end"] > info["start"]
+            ]
+            if not ranges:
+                continue
+
+            opened = {name: Column(os.path.join(self.directory, date, f"{name}.col")) for name in columns}
+            try:
+                for topic_name, info in ranges:
+                    for row in range(info["start"], info["end"]):
+                        record = {"date": date, "topic": topic_name}
+                        for name, column in opened.items():
+                            value = column[row]
+                            record[name] = value.split(SOURCES_SEPARATOR) if name == "sources" and value else value
+                        yield record
+            finally:
+                for column in opened.values():
+                    column.close()
+
+
+def _add(days: Dict[str, Dict], date: str, topic: str, emoji: str, article_id: Optional[str],
+         headline: str, text: str, sources: List[str]):
+    day = days.setdefault(date, {})
+    entry = day.setdefault(topic, {"emoji": emoji, "articles": [], "ids": {}})
+    article_id = article_id or _article_id(topic, headline, date, sources)
+    kept = entry["ids"].get(article_id)
+    if kept is not None:
+        if kept != (headline, text, list(sources)):
+            # Legacy dumps derived ids from headline and date alone
+            logging.warning(f"Dropping {topic} article {headline!r} on {date}: "
+                            f"id {article_id} is already archived with different content")
+        return
+    entry["ids"][article_id] = (headline, text, list(sources))
+    entry["articles"].append({"id": article_id, "headline": headline, "text": text, "sources": sources})
+
+
+def collect_public_data(days: Dict[str, Dict], directory: str = PUBLIC_DATA_DIR, exported: bool = True):
+    """Add the frontend's public/data day files.
+
+    Exported day files are rendered from the article store, with frontend
+    topic names and no ids, so pass exported=False when the store is collected
+    too or every stored article would be archived twice.
+    """
+    for date, path in day_paths(directory, exported).items():
+        with open(path, 'rb') as f:
+            day = schemas.decode(f.read(), schemas.Day)
+        for topic, section in day.items():
+            for item in section.headlines:
+                _add(days, date, topic, section.emoji, None, item.headline, item.text, item.sources)
+
+
+def _add_formatted(days: Dict[str, Dict], article: schemas.Article):
+    _add(days, article.date, article.topic, article.emoji, article.id.oid,
+         article.headline, article.text, article.sources)
+
+
+def collect_output_dumps(days: Dict[str, Dict], directory: str = 'output'):
+    """Add legacy backend/output/articles_*.json pipeline dumps"""
+    for path in sorted(glob.glob(os.path.join(directory, "articles_*.json"))):
+        with open(path, 'rb') as f:
+            run = schemas.decode(f.read(), schemas.ArticlesByTopic)
+        for topic_articles in run.values():
+            for article in topic_articles:
+                _add_formatted(days, article)
+
+
+def collect_article_store(days: Dict[str, Dict], store):
+    """Add every article in an ArticleStore"""
+    with store._lock:
+        docs = [row[0] for row in store.conn.execute("SELECT doc FROM articles ORDER BY date, topic, id")]
+    for doc in docs:
+        _add_formatted(days, schemas.decode(doc, schemas.Article))
+
+
+def convert(days: Dict[str, Dict], directory: str = ARCHIVE_DIR) -> int:
+    """Write collected days to the archive, returning the number of days written"""
+    for date in sorted(days):
+        write_day(date, days[date], directory)
+    return len(days)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the columnar article archive")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="archive directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="import existing day files and pipeline output")
+    convert_parser.add_argument("--public-data", default=PUBLIC_DATA_DIR)
+    convert_parser.add_argument("--output", default='output')
+    convert_parser.add_argument("--no-store", action="store_true", help="skip the article store")
+
+    query_parser = commands.add_parser("query", help="print matching rows as JSON lines")
+    query_parser.add_argument("--start")
+    query_parser.add_argument("--end")
+    query_parser.add_argument("--topic")
+    query_parser.add_argument("--columns", default="headline", help="comma-separated: " + ",".join(COLUMNS))
+
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        days: Dict[str, Dict] = {}
+        collect_public_data(days, args.public_data, exported=args.no_store)
+        collect_output_dumps(days, args.output)
+        if not args.no_store:
+            from article_store import ArticleStore
+            store = ArticleStore(os.path.join(args.output, 'articles.db'), args.output)
+            collect_article_store(days, store)
+            store.close()
+        written = convert(days, args.archive)
+        logging.info(f"Archived {written} days to {args.archive}")
+    else:
+        reader = ArchiveReader(args.archive)
+        for row in reader.scan(args.start, args.end, args.topic, args.columns.split(",")):
+            print(schemas.encode(row).decode('utf-8'))
+
+
+if __name__ == "__main__":
+    config.setup_logging()
+    main()
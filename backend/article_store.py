@@ -0,0 +1,261 @@
+import glob
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import schemas
+
+# Location of the indexed article store and the pipeline output it is built from
+OUTPUT_DIR = 'output'
+STORE_PATH = os.getenv('ARTICLES_DB', os.path.join(OUTPUT_DIR, 'articles.db'))
+
+# Days of articles to keep; 0 keeps everything
+ARTICLE_RETENTION_DAYS = int(os.getenv('ARTICLE_RETENTION_DAYS', '0'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    headline TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_date_topic ON articles (date, topic);
+CREATE INDEX IF NOT EXISTS idx_articles_topic_date ON articles (topic, date);
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+# Full-text index over headline and text, kept in step with articles by triggers.
+# It is contentless: matches are joined back to articles by rowid.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    headline, text, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, headline, text)
+    VALUES (new.rowid, new.headline, json_extract(new.doc, '$.text'));
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, text)
+    VALUES ('delete', old.rowid, old.headline, json_extract(old.doc, '$.text'));
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, text)
+    VALUES ('delete', old.rowid, old.headline, json_extract(old.doc, '$.text'));
+    INSERT INTO articles_fts (rowid, headline, text)
+    VALUES (new.rowid, new.headline, json_extract(new.doc, '$.text'));
+END;
+"""
+
+# bm25 weights for (headline, text): a headline match counts for more
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query of quoted terms; a trailing * keeps prefix matching"""
+    terms = []
+    for term in text.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+class ArticleStore:
+    """SQLite-backed article store queried by date, date range, topic and _id.
+
+    Pipeline runs upsert into it by _id, so re-running a day rewrites nothing
+    that hasn't changed and disk use grows with articles rather than with runs.
+    Each article is stored as its original JSON document so reads can hand the
+    text straight back to clients without decoding and re-encoding it.
+    """
+
+    def __init__(self, path: str = STORE_PATH, output_dir: str = OUTPUT_DIR):
+        self.path = path
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._output_mtime_ns = None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.search_enabled = self._create_search_index()
+
+    def _create_search_index(self) -> bool:
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone() is not None
+        try:
+            with self.conn:
+                self.conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Full-text search unavailable: {str(e)}")
+            return False
+        if not exists:
+            # Index articles stored before the search index existed
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO articles_fts (rowid, headline, text) "
+                    "SELECT rowid, headline, json_extract(doc, '$.text') FROM articles"
+                )
+        return True
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def upsert(self, articles: Iterable[Dict]) -> int:
+        """Insert or replace formatted articles keyed by their _id"""
+        rows = [
+            (
+                article["_id"]["$oid"],
+                article["date"],
+                article["topic"],
+                article["headline"],
+                schemas.encode(article).decode('utf-8')
+            )
+            for article in articles
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO articles (id, date, topic, headline, doc) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET date = excluded.date, topic = excluded.topic, "
+                "headline = excluded.headline, doc = excluded.doc "
+                "WHERE articles.doc != excluded.doc",
+                rows
+            )
+        return len(rows)
+
+    def get(self, article_id: str) -> Optional[str]:
+        """Return the JSON document for an _id, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT doc FROM articles WHERE id = ?", (article_id,)).fetchone()
+        return row[0] if row else None
+
+    def prune(self, keep_days: int = ARTICLE_RETENTION_DAYS) -> int:
+        """Delete articles older than keep_days; 0 keeps everything"""
+        if keep_days <= 0:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+        with self._lock, self.conn:
+            deleted = self.conn.execute("DELETE FROM articles WHERE date < ?", (cutoff,)).rowcount
+        if deleted:
+            logging.info(f"Pruned {deleted} articles dated before {cutoff}")
+        return deleted
+
+    def ingest_output_dir(self) -> int:
+        """Import legacy articles_*.json dumps that are new or changed since the last call"""
+        try:
+            mtime_ns = os.stat(self.output_dir).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        if mtime_ns == self._output_mtime_ns:
+            return 0
+
+        with self._lock:
+            known = dict(
+                (path, (mtime, size))
+                for path, mtime, size in self.conn.execute("SELECT path, mtime_ns, size FROM ingested_files")
+            )
+
+        ingested = 0
+        for path in sorted(glob.glob(os.path.join(self.output_dir, 'articles_*.json'))):
+            stat = os.stat(path)
+            name = os.path.basename(path)
+            if known.get(name) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    run = schemas.decode(f.read())
+            except Exception as e:
+                logging.warning(f"Skipping unreadable output file {path}: {str(e)}")
+                continue
+            for topic_articles in run.values():
+                ingested += self.upsert(topic_articles)
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                    (name, stat.st_mtime_ns, stat.st_size)
+                )
+
+        self._output_mtime_ns = mtime_ns
+        if ingested:
+            logging.info(f"Indexed {ingested} articles from {self.output_dir}")
+        return ingested
+
+    def query(self, start: str, end: Optional[str] = None, topic: Optional[str] = None,
+              limit: int = 50, offset: int = 0) -> Tuple[int, List[str]]:
+        """Return the total match count and one page of JSON documents for a date range"""
+        where = "date BETWEEN ? AND ?"
+        params: list = [start, end or start]
+        if topic:
+            where += " AND topic = ?"
+            params.append(topic)
+
+        with self._lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM articles WHERE {where}", params).fetchone()[0]
+            docs = [
+                row[0] for row in self.conn.execute(
+                    f"SELECT doc FROM articles WHERE {where} ORDER BY date DESC, topic, id LIMIT ? OFFSET ?",
+                    params + [limit, offset]
+                )
+            ]
+        return total, docs
+
+    def for_date(self, date: str) -> List[str]:
+        """Every JSON document for one date, grouped by topic"""
+        with self._lock:
+            return [
+                row[0] for row in self.conn.execute(
+                    "SELECT doc FROM articles WHERE date = ? ORDER BY topic, id", (date,)
+                )
+            ]
+
+    def search(self, text: str, topic: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, limit: int = 50, offset: int = 0) -> Tuple[int, List[str]]:
+        """Return the total match count and one page of JSON documents ranked by bm25"""
+        if not self.search_enabled:
+            raise RuntimeError("Full-text search is not available in this SQLite build")
+        query = fts_query(text)
+        if not query:
+            return 0, []
+
+        # Let the full-text index drive: materialize its matches first, then
+        # join to articles for the filters, rather than re-running MATCH per row
+        where = "1"
+        params: list = [query]
+        if topic:
+            where += " AND a.topic = ?"
+            params.append(topic)
+        if start:
+            where += " AND a.date >= ?"
+            params.append(start)
+        if end:
+            where += " AND a.date <= ?"
+            params.append(end)
+
+        with self._lock:
+            rows = self.conn.execute(
+                "WITH matches AS MATERIALIZED ("
+                f"SELECT rowid, bm25(articles_fts, {SEARCH_WEIGHTS[0]}, {SEARCH_WEIGHTS[1]}) AS score "
+                "FROM articles_fts WHERE articles_fts MATCH ?) "
+                "SELECT a.doc, COUNT(*) OVER () FROM matches m JOIN articles a ON a.rowid = m.rowid "
+                f"WHERE {where} ORDER BY m.score, a.date DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        if rows:
+            return rows[0][1], [row[0] for row in rows]
+        if offset == 0:
+            return 0, []
+        # Past the last page: still report the total
+        total, _ = self.search(text, topic, start, end, limit=1, offset=0)
+        return total, []
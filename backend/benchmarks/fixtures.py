@@ -0,0 +1,114 @@
+"""Scaled inputs for the ingestion benchmarks, built from recorded fixtures.
+
+fixtures/feed.xml is one recorded RSS feed (20 entries published on
+FIXTURE_DATE, in the mix of date formats and timezones real feeds use). A
+fetcher reads about FEEDS_PER_TOPIC such feeds a day, so scale 1 is today's
+volume for one topic and scale N repeats each feed's entries N times with
+distinct headlines and links. About one entry in ten is shared by every feed
+so dedupe has work to do.
+"""
+import os
+import re
+from html import unescape
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from records import FeedArticle
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FEED_FIXTURE = os.path.join(FIXTURES_DIR, 'feed.xml')
+FIXTURE_DATE = '2025-04-07'
+
+FEEDS_PER_TOPIC = 15
+SHARED_EVERY = 10  # every tenth copy of an entry appears in all feeds
+TOPICS = ["politics", "business", "science", "tech", "sports", "entertainment"]
+ARTICLES_PER_TOPIC = 5  # what each fetcher keeps after ranking
+
+_ITEM = re.compile(r'<item>.*?</item>', re.S)
+_TAG = r'<{0}>(.*?)</{0}>'
+
+
+def feed_urls(count: int = FEEDS_PER_TOPIC) -> List[str]:
+    return [f"https://feed{i}.example.com/rss.xml" for i in range(count)]
+
+
+def recorded_items() -> List[Dict[str, str]]:
+    """The recorded feed's entries as raw (still XML-escaped) field strings"""
+    with open(FEED_FIXTURE, 'r', encoding='utf-8') as f:
+        xml = f.read()
+    return [
+        {name: re.search(_TAG.format(name), item, re.S).group(1)
+         for name in ("title", "link", "description", "pubDate")}
+        for item in _ITEM.findall(xml)
+    ]
+
+
+def _copy_id(feed: int, copy_number: int) -> str:
+    return str(copy_number) if copy_number % SHARED_EVERY == 0 else f"{feed}-{copy_number}"
+
+
+def scaled_feed(feed: int, scale: int) -> str:
+    """RSS document for one feed with its recorded entries repeated scale times"""
+    items = recorded_items()
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>', '<rss version="2.0">', '<channel>',
+             f'<title>Feed {feed}</title>', f'<link>https://feed{feed}.example.com/</link>']
+    for copy_number in range(scale):
+        suffix = _copy_id(feed, copy_number)
+        for i, item in enumerate(items):
+            parts.append(
+                f"<item><title>{item['title']} {escape(suffix)}</title>"
+                f"<link>https://news.example.com/{suffix}/{i}?utm_source=rss</link>"
+                f"<description>{item['description']}</description>"
+                f"<pubDate>{item['pubDate']}</pubDate></item>"
+            )
+    parts += ['</channel>', '</rss>']
+    return "\n".join(parts)
+
+
+def scaled_feeds(scale: int, feeds: int = FEEDS_PER_TOPIC) -> Dict[str, str]:
+    """feed URL -> RSS document, for one topic at scale"""
+    return {url: scaled_feed(feed, scale) for feed, url in enumerate(feed_urls(feeds))}
+
+
+def date_strings(scale: int, feeds: int = FEEDS_PER_TOPIC) -> List[str]:
+    """The pubDate of every entry one topic sees at scale"""
+    return [item["pubDate"] for item in recorded_items()] * (scale * feeds)
+
+
+def feed_articles(scale: int, feeds: int = FEEDS_PER_TOPIC) -> Dict[str, List[FeedArticle]]:
+    """feed URL -> the records the date filter would keep from it at scale"""
+    items = recorded_items()
+    articles = {}
+    for feed, url in enumerate(feed_urls(feeds)):
+        sources = (url,)
+        records = articles[url] = []
+        for copy_number in range(scale):
+            suffix = _copy_id(feed, copy_number)
+            for i, item in enumerate(items):
+                records.append(FeedArticle(
+                    f"{unescape(item['title'])} {suffix}", FIXTURE_DATE, unescape(item['description']),
+                    sources, f"https://news.example.com/{suffix}/{i}?utm_source=rss"
+                ))
+    return articles
+
+
+def formatted_articles(scale: int) -> Dict[str, List[Dict]]:
+    """topic -> formatted article dicts, ARTICLES_PER_TOPIC * scale per topic"""
+    items = recorded_items()
+    topics = {}
+    for topic in TOPICS:
+        articles = topics[topic] = []
+        for n in range(ARTICLES_PER_TOPIC * scale):
+            item = items[n % len(items)]
+            articles.append({
+                "_id": {"$oid": f"{topic[:3]}{n:021d}"},
+                "topic": topic,
+                "headline": f"{unescape(item['title'])} {n}",
+                "date": FIXTURE_DATE,
+                "comments": [],
+                "emoji": "📰",
+                "ratings": [],
+                "sources": [f"https://feed{n % FEEDS_PER_TOPIC}.example.com/rss.xml"],
+                "text": unescape(item['description'])
+            })
+    return topics
@@ -0,0 +1,93 @@
+"""Memory benchmark: fetched articles as dicts vs slotted FeedArticle records.
+
+Builds a synthetic candidate pool the size of a multi-day backfill in both
+shapes and reports the memory each retains, measured with tracemalloc, then
+the peak while the pool goes through the interest filter and formatting.
+
+    python benchmarks/memory_records.py              # 100k articles
+    python benchmarks/memory_records.py 1000000
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import FeedArticle  # noqa: E402
+
+FEEDS = [f"https://feeds.example.com/{i}/rss.xml" for i in range(15)]
+DATES = ["2025-04-%02d" % day for day in range(1, 31)]
+WORDS = "market launch court senate study vaccine league galaxy startup merger record policy".split()
+
+
+def entry(i: int):
+    headline = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(8)) + f" {i}"
+    text = " ".join(WORDS[(i * 7 + k) % len(WORDS)] for k in range(40))
+    return headline, DATES[i % len(DATES)], text, FEEDS[i % len(FEEDS)], f"https://news.example.com/a/{i}"
+
+
+def as_dicts(n: int):
+    # The shape fetch_feed produced before records
+    articles = []
+    for i in range(n):
+        headline, date, text, feed, url = entry(i)
+        articles.append({'headline': headline, 'published_date': date, 'text': text, 'sources': [feed], 'url': url})
+    return articles
+
+
+def as_records(n: int):
+    sources = {feed: (feed,) for feed in FEEDS}
+    articles = []
+    for i in range(n):
+        headline, date, text, feed, url = entry(i)
+        articles.append(FeedArticle(headline, date, text, sources[feed], url))
+    return articles
+
+
+def measure(build, n: int):
+    tracemalloc.start()
+    pool = build(n)
+    retained, _ = tracemalloc.get_traced_memory()
+    del pool
+    tracemalloc.stop()
+    return retained
+
+
+def measure_pipeline(n: int):
+    """Peak memory of records through the interest filter and formatting"""
+    from tech_fetcher import is_article_interesting
+    import seen_index
+
+    tracemalloc.start()
+    pool = as_records(n)
+    candidates = [article for article in pool if is_article_interesting(article)]
+    formatted = [
+        {
+            "_id": {"$oid": seen_index.article_id(article)},
+            "topic": "tech",
+            "headline": article.headline,
+            "date": article.published_date,
+            "sources": list(article.sources),
+            "text": article.text
+        }
+        for article in candidates[:1000]
+    ]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, len(candidates), len(formatted)
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 100_000
+    dict_bytes = measure(as_dicts, n)
+    record_bytes = measure(as_records, n)
+    print(f"{n} articles")
+    print(f"  dicts:   {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / n:.0f} B/article)")
+    print(f"  records: {record_bytes / 2**20:8.1f} MiB ({record_bytes / n:.0f} B/article)")
+    print(f"  saved:   {(1 - record_bytes / dict_bytes) * 100:8.1f} %")
+    peak, candidates, formatted = measure_pipeline(n)
+    print(f"  pipeline peak with records: {peak / 2**20:.1f} MiB ({candidates} candidates, {formatted} formatted)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
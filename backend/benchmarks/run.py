@@ -0,0 +1,299 @@
+"""Benchmarks for the ingestion pipeline hot paths, checked against stored baselines.
+
+Each case times one stage of the pipeline on inputs built from the recorded
+fixtures (see fixtures.py), scaled from today's volume: scale 10 is ten
+times what one topic fetches (or the site serves) in a day. The tech fetcher
+stands in for the six near-identical fetchers. Network, Gemini and the seen
+index are taken out of the loop, and tracing is off unless TRACING_ENABLED is
+set, so only our own code is measured.
+
+Every case runs until it has REPEAT timings or has used TIME_BUDGET seconds,
+and its best time is compared with baselines.json. A case slower than the
+baseline by more than the threshold is reported as a regression and the
+script exits non-zero, so it can gate a change in CI.
+
+    python benchmarks/run.py                         # default scales, compare to baselines
+    python benchmarks/run.py --scales 10,100,1000    # the full sweep (the 1000x feed cases take minutes)
+    python benchmarks/run.py --cases parse,dates
+    python benchmarks/run.py --save-baseline         # record this machine's numbers
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+# Spans would be exported to output/traces after every timed run
+os.environ.setdefault('TRACING_ENABLED', '0')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+import pipeline  # noqa: E402
+import tech_fetcher  # noqa: E402
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_SCALES = [10, 100]
+DEFAULT_THRESHOLD = 1.5  # best time / baseline above this is a regression; timings on shared machines vary
+REPEAT = 5
+MIN_TIME = 0.5  # keep repeating fast cases for at least this long, to steady their best time
+TIME_BUDGET = 10.0  # seconds of timed runs per case and scale
+
+CASES: Dict[str, Tuple[str, Callable[[int], Tuple[Callable[[], object], int]]]] = {}
+
+
+def case(name: str, description: str):
+    """Register a case; its setup(scale) returns (run, items processed per run)"""
+    def decorator(setup):
+        CASES[name] = (description, setup)
+        return setup
+    return decorator
+
+
+class FakeResponse:
+    def __init__(self, body: str):
+        self.status = 200
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """Serves recorded feed documents in place of aiohttp.ClientSession"""
+
+    def __init__(self, documents: Dict[str, str]):
+        self.documents = documents
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        return FakeResponse(self.documents[url])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@contextmanager
+def offline_fetcher(**patches):
+    """Patch tech_fetcher attributes, with no seen index and no leftover ranking cache"""
+    with mock.patch.object(tech_fetcher.seen_index, 'SEEN_INDEX_ENABLED', False):
+        with mock.patch.multiple(tech_fetcher, **patches):
+            tech_fetcher.api_cache.clear()
+            yield
+
+
+@case("parse", "feedparser over one topic's feeds")
+def parse_case(scale: int):
+    import feedparser
+    documents = list(fixtures.scaled_feeds(scale).values())
+
+    def run():
+        for document in documents:
+            feedparser.parse(document)
+    return run, len(documents) * scale * len(fixtures.recorded_items())
+
+
+@case("fetch_feed", "one feed at a time through the pipeline's fetch, parse and date filter")
+def fetch_feed_case(scale: int):
+    import feedparser
+    documents = fixtures.scaled_feeds(scale)
+    session = FakeSession(documents)
+
+    async def fetch():
+        for url in documents:
+            content = await pipeline.fetch_feed(session, tech_fetcher.TOPIC, url)
+            pipeline.filter_by_date(feedparser.parse(content).entries, url, fixtures.FIXTURE_DATE)
+
+    def run():
+        asyncio.run(fetch())
+    return run, len(documents) * scale * len(fixtures.recorded_items())
+
+
+@case("dates", "date normalisation of every entry's pubDate")
+def dates_case(scale: int):
+    from dateutil.parser import parse
+    dates = fixtures.date_strings(scale)
+
+    def run():
+        for date_field in dates:
+            parse(date_field, tzinfos=pipeline.TZINFOS).strftime('%Y-%m-%d')
+    return run, len(dates)
+
+
+@case("interesting", "is_article_interesting over every fetched record")
+def interesting_case(scale: int):
+    articles = [article for records in fixtures.feed_articles(scale).values() for article in records]
+
+    def run():
+        for article in articles:
+            tech_fetcher.is_article_interesting(article)
+    return run, len(articles)
+
+
+@case("dedupe", "the pipeline's dedupe stage claiming headlines and collecting candidates in feed order")
+def dedupe_case(scale: int):
+    per_feed = list(fixtures.feed_articles(scale).values())
+
+    def run():
+        candidates = pipeline.Candidates()
+        for index, articles in enumerate(per_feed):
+            candidates.add(index, candidates.claim(index, articles))
+        candidates.articles()
+    return run, sum(len(records) for records in per_feed)
+
+
+@case("daily", "get_daily_tech_articles end to end over recorded feeds: stream, filter, dedupe, rank and format")
+def daily_case(scale: int):
+    documents = fixtures.scaled_feeds(scale)
+    urls = list(documents)
+
+    def run():
+        # Ranking keeps every article so the formatting loop sees the full volume
+        with offline_fetcher(rss_feeds=lambda: urls, analyze_article_with_gemini=lambda items: items), \
+                mock.patch('aiohttp.ClientSession', lambda **kwargs: FakeSession(documents)):
+            asyncio.run(tech_fetcher.get_daily_tech_articles())
+    return run, len(documents) * scale * len(fixtures.recorded_items())
+
+
+@case("serialise", "RunWriter writing every topic of a run to JSONL")
+def serialise_case(scale: int):
+    from run_writer import RunWriter
+    topics = fixtures.formatted_articles(scale)
+    directory = tempfile.mkdtemp(prefix="curv-bench-")
+    atexit.register(shutil.rmtree, directory, True)
+    writer = RunWriter("bench", directory)
+
+    def run():
+        for topic, articles in topics.items():
+            writer._write_topic(topic, articles)
+    return run, sum(len(articles) for articles in topics.values())
+
+
+@case("render", "/articles page rendering for every topic")
+def render_case(scale: int):
+    import main
+    topics = fixtures.formatted_articles(scale)
+    template = main.templates.get_template("articles.html")
+
+    def run():
+        formatted = {topic: main.format_topic_articles(articles) for topic, articles in topics.items()}
+        template.render(articles=formatted).encode('utf-8')
+    return run, sum(len(articles) for articles in topics.values())
+
+
+def measure(run: Callable[[], object], repeat: int = REPEAT, budget: float = TIME_BUDGET) -> Tuple[float, int]:
+    """Best wall time of at least repeat runs (or MIN_TIME seconds of them) within budget, and how many ran"""
+    times = []
+    started = time.perf_counter()
+    while True:
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget or (len(times) >= repeat and elapsed >= MIN_TIME):
+            return min(times), len(times)
+
+
+def load_baselines(path: str = BASELINES_FILE) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"cases": {}}
+
+
+def save_baselines(results: Dict[str, Dict[str, float]], path: str = BASELINES_FILE):
+    """Merge results into the stored baselines"""
+    baselines = load_baselines(path)
+    for name, scales in results.items():
+        baselines["cases"].setdefault(name, {}).update(scales)
+    baselines["machine"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine()
+    }
+    baselines["updated_at"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    baselines["cases"] = {name: baselines["cases"][name] for name in sorted(baselines["cases"])}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2)
+        f.write("\n")
+
+
+def run_cases(names: List[str], scales: List[int], threshold: float,
+              baselines: Optional[Dict] = None) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """Time every case at every scale, printing a row each, and return results and regressions"""
+    baselines = (baselines or {}).get("cases", {})
+    results: Dict[str, Dict[str, float]] = {}
+    regressions = []
+    print(f"{'case':<12} {'scale':>6} {'items':>9} {'best':>10} {'per item':>10} {'runs':>5} {'baseline':>10} {'ratio':>7}")
+    for name in names:
+        _, setup = CASES[name]
+        for scale in scales:
+            run, items = setup(scale)
+            best, runs = measure(run)
+            results.setdefault(name, {})[str(scale)] = round(best, 6)
+            baseline = baselines.get(name, {}).get(str(scale))
+            ratio = best / baseline if baseline else None
+            status = ""
+            if ratio is not None and ratio > threshold:
+                status = "REGRESSION"
+                regressions.append(f"{name} x{scale}")
+            elif ratio is not None and ratio < 1 / threshold:
+                status = "faster"
+            print(f"{name:<12} {scale:>6} {items:>9} {best * 1000:>8.1f}ms {best / items * 1e6:>8.2f}us {runs:>5} "
+                  f"{(f'{baseline * 1000:.1f}ms' if baseline else '-'):>10} "
+                  f"{(f'{ratio:.2f}' if ratio is not None else '-'):>7} {status}", flush=True)
+    return results, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion pipeline hot paths")
+    parser.add_argument("--cases", help=f"comma-separated cases (default: all of {', '.join(CASES)})")
+    parser.add_argument("--scales", default=",".join(str(scale) for scale in DEFAULT_SCALES),
+                        help="comma-separated multiples of today's volume")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio against the baseline that counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store these timings as the new baseline")
+    parser.add_argument("--baselines", default=BASELINES_FILE)
+    args = parser.parse_args(argv)
+
+    names = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}. Choose from: {', '.join(CASES)}")
+    scales = [int(scale) for scale in args.scales.split(",")]
+
+    # Templates and relative output paths resolve from the backend directory
+    os.chdir(BACKEND_DIR)
+    results, regressions = run_cases(names, scales, args.threshold, load_baselines(args.baselines))
+
+    if args.save_baseline:
+        save_baselines(results, args.baselines)
+        print(f"Saved baselines to {args.baselines}")
+        return 0
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.2f}x: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
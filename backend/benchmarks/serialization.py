@@ -0,0 +1,90 @@
+"""Serialization benchmark: stdlib json vs the schemas module on a year of archive.
+
+Builds a synthetic year of formatted articles (365 days x 6 topics) and times
+encoding and decoding it as one JSON document per day, the way the archive,
+the run writer and the API handle it. With msgspec installed the schemas
+module uses it; without it the numbers match the stdlib.
+
+    python benchmarks/serialization.py                # 50 articles per topic per day
+    python benchmarks/serialization.py 200
+"""
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schemas  # noqa: E402
+
+TOPICS = ["politics", "business", "science", "tech", "sports", "entertainment"]
+REPEAT = 3
+
+
+def year_of_days(per_topic: int):
+    start = date(2024, 1, 1)
+    days = []
+    for offset in range(365):
+        day = (start + timedelta(days=offset)).isoformat()
+        days.append([
+            {
+                "_id": {"$oid": f"{offset:04d}{topic[:3]}{i:05d}"},
+                "topic": topic,
+                "headline": f"Héadline {i} about {topic} on {day} with some more words in it",
+                "date": day,
+                "comments": [],
+                "emoji": "📰",
+                "ratings": [],
+                "sources": [f"https://feeds.example.com/{topic}/rss.xml"],
+                "text": f"Summary of story {i}. " * 12
+            }
+            for topic in TOPICS for i in range(per_topic)
+        ])
+    return days
+
+
+def best_of(func):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv):
+    per_topic = int(argv[0]) if argv else 50
+    days = year_of_days(per_topic)
+    articles = sum(len(day) for day in days)
+    encoded = [json.dumps(day, ensure_ascii=False, separators=(',', ':')).encode('utf-8') for day in days]
+    size_mb = sum(len(data) for data in encoded) / 2**20
+    backend = "msgspec" if schemas.msgspec is not None else "stdlib fallback"
+    print(f"{articles} articles, {size_mb:.1f} MiB compact JSON; schemas backend: {backend}\n")
+
+    cases = [
+        ("encode compact",
+         lambda: [json.dumps(day, ensure_ascii=False, separators=(',', ':')).encode('utf-8') for day in days],
+         lambda: [schemas.encode(day) for day in days]),
+        ("encode pretty",
+         lambda: [json.dumps(day, ensure_ascii=False, indent=2).encode('utf-8') for day in days],
+         lambda: [schemas.encode(day, pretty=True) for day in days]),
+        ("decode",
+         lambda: [json.loads(data) for data in encoded],
+         lambda: [schemas.decode(data) for data in encoded]),
+        ("decode typed",
+         lambda: [json.loads(data) for data in encoded],
+         lambda: [schemas.decode(data, List[schemas.Article]) for data in encoded]),
+    ]
+    print(f"{'case':16} {'stdlib':>10} {'schemas':>10} {'MiB/s':>8} {'speedup':>8}")
+    for name, stdlib, ours in cases:
+        stdlib_time = best_of(stdlib)
+        our_time = best_of(ours)
+        print(f"{name:16} {stdlib_time * 1000:8.0f}ms {our_time * 1000:8.0f}ms "
+              f"{size_mb / our_time:8.0f} {stdlib_time / our_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
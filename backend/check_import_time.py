@@ -0,0 +1,79 @@
+"""Enforce the backend's import-time budget.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each
+budgeted entry point and fails if the cumulative import time exceeds its budget
+or if a heavy dependency that should be imported lazily shows up.
+
+    python check_import_time.py            # check every budget
+    python check_import_time.py main       # check one module
+"""
+import os
+import subprocess
+import sys
+
+# Cumulative import time budget per entry point, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "config": 50,
+    "politics_fetcher": 150,
+    "run_all_fetchers": 250,
+    "main": 1000,
+}
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ["google.generativeai", "feedparser", "aiohttp", "dateutil"]
+
+RUNS = 3  # take the best of several runs to smooth out noise
+
+
+def measure(module: str):
+    """Return (cumulative import time in ms, set of imported module names) for module"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        imported.add(name.strip())
+        if name.rstrip() == f" {module}":
+            cumulative_us = int(cumulative)
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry found for {module}")
+    return cumulative_us / 1000, imported
+
+
+def check(module: str, budget_ms: float) -> bool:
+    best_ms = None
+    for _ in range(RUNS):
+        elapsed_ms, imported = measure(module)
+        best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+
+    eager = sorted(
+        lazy for lazy in LAZY_MODULES
+        if any(name == lazy or name.startswith(lazy + ".") for name in imported)
+    )
+    ok = best_ms <= budget_ms and not eager
+    status = "OK  " if ok else "FAIL"
+    print(f"{status} {module}: {best_ms:.1f} ms (budget {budget_ms} ms)")
+    if eager:
+        print(f"     imported eagerly: {', '.join(eager)}")
+    return ok
+
+
+def main(argv):
+    modules = argv or list(IMPORT_BUDGETS_MS)
+    results = [check(module, IMPORT_BUDGETS_MS[module]) for module in modules]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
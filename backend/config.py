@@ -0,0 +1,102 @@
+"""Shared one-time configuration for the backend.
+
+Everything here is deferred until first use so that importing the fetchers,
+the CLI scripts or the web server stays cheap. Heavy third-party modules
+(google.generativeai in particular) are only imported when they are needed.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+# Pipeline topic names that the frontend (Article model, public/data) spells differently
+FRONTEND_TOPICS = {"tech": "technology"}
+
+_environment_loaded = False
+_logging_configured = False
+_genai = None
+_warned_missing_key = False
+
+
+def load_environment():
+    """Load variables from .env once per process"""
+    global _environment_loaded
+    if not _environment_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _environment_loaded = True
+
+
+def setup_logging():
+    """Configure root logging once per process"""
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        _logging_configured = True
+
+
+def gemini_api_key():
+    load_environment()
+    return os.getenv('GEMINI_API_KEY')
+
+
+def gemini_endpoint():
+    """GEMINI_API_ENDPOINT overrides the Gemini API host, for local stubs and load tests"""
+    load_environment()
+    return os.getenv('GEMINI_API_ENDPOINT')
+
+
+def feed_urls(topic: str, default):
+    """A topic's RSS feeds, unless FEED_URLS_<TOPIC> (comma-separated) or FEEDS_BASE_URL replaces them.
+
+    FEEDS_BASE_URL keeps the number of feeds and points each at <base>/<topic>/<n>.xml,
+    the layout mock_services.py serves.
+    """
+    load_environment()
+    explicit = os.getenv(f"FEED_URLS_{topic.upper()}")
+    if explicit:
+        return [url.strip() for url in explicit.split(',') if url.strip()]
+    base = os.getenv('FEEDS_BASE_URL')
+    if base:
+        return [f"{base.rstrip('/')}/{topic}/{number}.xml" for number in range(len(default))]
+    return default
+
+
+def use_gemini() -> bool:
+    """True when a Gemini API key is configured"""
+    return bool(gemini_api_key())
+
+
+def get_genai():
+    """Import and configure google.generativeai on first use, or return None without a key"""
+    global _genai, _warned_missing_key
+    if _genai is None:
+        api_key = gemini_api_key()
+        if not api_key:
+            if not _warned_missing_key:
+                logging.warning("GEMINI_API_KEY not found. Article analysis will be skipped.")
+                _warned_missing_key = True
+            return None
+        import google.generativeai as genai
+        endpoint = gemini_endpoint()
+        if endpoint:
+            # A local stand-in such as mock_services.py, which speaks the REST API
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        logging.info("Gemini API configured successfully")
+        _genai = genai
+    return _genai
+
+
+def get_yesterdays_date() -> str:
+    """Get yesterday's date in YYYY-MM-DD format"""
+    yesterday = datetime.now() - timedelta(days=1)
+    return yesterday.strftime('%Y-%m-%d')
+
+
+def frontend_topic(topic: str) -> str:
+    """The frontend's name for a pipeline topic"""
+    return FRONTEND_TOPICS.get(topic, topic)
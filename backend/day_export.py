@@ -0,0 +1,134 @@
+"""Export pipeline articles to the frontend's public/data day files.
+
+Each exported day is written in the public/data layout
+({topic: {"emoji", "headlines": [{"headline", "text", "sources"}]}}) under a
+content-hashed name, YYYY-MM-DD.<hash>.json, so a CDN can cache it forever.
+public/data/index.json maps each date to its current file and hash and is the
+only file that changes in place. A day is rewritten only when its content
+hash changes, and superseded day files are removed once they are older than
+EXPORT_RETENTION so clients holding an old index can still fetch them.
+
+The files go to PUBLIC_DATA_DIR (the repo's public/data unless overridden).
+run_all_fetchers exports its run only when EXPORT_DAY_FILES=1.
+
+    python day_export.py                  # dates in the latest pipeline run
+    python day_export.py 2025-04-10 2025-04-11
+    python day_export.py --all            # every date in the article store
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterable, List
+
+import config
+import schemas
+from article_store import ArticleStore
+from day_index import EXPORT_INDEX_FILE, PUBLIC_DATA_DIR
+
+INDEX_VERSION = 1
+HASH_LENGTH = 12  # hex digits of sha256 in exported file names
+EXPORT_RETENTION = int(os.getenv('EXPORT_RETENTION', str(24 * 3600)))  # seconds to keep superseded files
+EXPORT_DAY_FILES = os.getenv('EXPORT_DAY_FILES', '0') == '1'
+
+HASHED_NAME = re.compile(r'^(\d{4}-\d{2}-\d{2})\.([0-9a-f]+)\.json$')
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_index(directory: str = PUBLIC_DATA_DIR) -> Dict:
+    try:
+        with open(os.path.join(directory, EXPORT_INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"version": INDEX_VERSION, "dates": {}}
+
+
+def render_day(docs: Iterable[str]) -> bytes:
+    """One day's stored article documents in the public/data layout"""
+    day: schemas.Day = {}
+    for doc in docs:
+        article = schemas.decode(doc, schemas.Article)
+        section = day.get(config.frontend_topic(article.topic))
+        if section is None:
+            section = day[config.frontend_topic(article.topic)] = schemas.DaySection(article.emoji, [])
+        section.headlines.append(schemas.Headline(article.headline, article.text, article.sources))
+    return schemas.encode({topic: day[topic] for topic in sorted(day)})
+
+
+def export_dates(dates: Iterable[str], store: ArticleStore, directory: str = PUBLIC_DATA_DIR) -> List[str]:
+    """Write day files for dates whose content changed and return those dates"""
+    os.makedirs(directory, exist_ok=True)
+    index = load_index(directory)
+    changed = []
+    for date in sorted(set(dates)):
+        docs = store.for_date(date)
+        if not docs:
+            continue
+        data = render_day(docs)
+        digest = hashlib.sha256(data).hexdigest()
+        entry = index["dates"].get(date)
+        if entry and entry["sha256"] == digest and os.path.exists(os.path.join(directory, entry["file"])):
+            continue
+        name = f"{date}.{digest[:HASH_LENGTH]}.json"
+        _write_atomic(os.path.join(directory, name), data)
+        index["dates"][date] = {"file": name, "sha256": digest, "articles": len(docs)}
+        changed.append(date)
+
+    if changed:
+        index["dates"] = {date: index["dates"][date] for date in sorted(index["dates"])}
+        index["updated_at"] = time.time()
+        _write_atomic(os.path.join(directory, EXPORT_INDEX_FILE), json.dumps(index, indent=2).encode('utf-8'))
+        logging.info(f"Exported {len(changed)} day files to {directory}")
+    prune_exports(index, directory)
+    return changed
+
+
+def prune_exports(index: Dict, directory: str = PUBLIC_DATA_DIR, retention: int = EXPORT_RETENTION):
+    """Delete superseded hashed day files older than the retention window"""
+    current = {entry["file"] for entry in index["dates"].values()}
+    cutoff = time.time() - retention
+    for path in glob.glob(os.path.join(directory, "????-??-??.*.json")):
+        name = os.path.basename(path)
+        if HASHED_NAME.match(name) and name not in current and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored articles to public/data day files")
+    parser.add_argument("dates", nargs="*", help="dates to export, YYYY-MM-DD")
+    parser.add_argument("--all", action="store_true", help="export every date in the article store")
+    parser.add_argument("--output", default=PUBLIC_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    store = ArticleStore()
+    try:
+        if args.all:
+            with store._lock:
+                dates = [row[0] for row in store.conn.execute("SELECT DISTINCT date FROM articles")]
+        elif args.dates:
+            dates = args.dates
+        else:
+            from run_writer import iter_run_articles
+            dates = {article["date"] for article in iter_run_articles()}
+        changed = export_dates(dates, store, args.output)
+    finally:
+        store.close()
+    print(f"Exported {len(changed)} changed days to {args.output}")
+
+
+if __name__ == "__main__":
+    config.setup_logging()
+    main()
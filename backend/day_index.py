@@ -0,0 +1,209 @@
+"""Byte-offset sidecar index for public/data day files.
+
+A day file holds every topic, so reading one topic used to mean parsing the
+whole document. The sidecar (<day>.json.idx) records the byte range of each
+topic section and of each headline inside it, so `DayFile` can seek straight
+to one topic or one headline and decode only those bytes. The index is
+rebuilt whenever the day file's size or mtime no longer match it.
+
+    python day_index.py                   # index every day file in ../public/data
+    python day_index.py 2024-04-08 sports # print one topic using the index
+"""
+import glob
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import schemas
+
+# The frontend's public/data, found from this file so it doesn't depend on the working directory
+PUBLIC_DATA_DIR = os.getenv('PUBLIC_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'data'))
+INDEX_SUFFIX = '.idx'
+EXPORT_INDEX_FILE = 'index.json'  # date -> content-hashed day file, written by day_export
+INDEX_VERSION = 1
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def _skip(text: str, pos: int) -> int:
+    while text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _members(text: str, pos: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (key_start, key_end, value_start, value_end) for the object at pos"""
+    pos = _skip(text, pos)
+    if text[pos] != '{':
+        raise ValueError(f"Expected an object at offset {pos}")
+    pos = _skip(text, pos + 1)
+    if text[pos] == '}':
+        return
+    while True:
+        key_start = pos
+        _, key_end = _decoder.raw_decode(text, key_start)
+        pos = _skip(text, key_end)
+        if text[pos] != ':':
+            raise ValueError(f"Expected ':' at offset {pos}")
+        value_start = _skip(text, pos + 1)
+        _, value_end = _decoder.raw_decode(text, value_start)
+        yield key_start, key_end, value_start, value_end
+        pos = _skip(text, value_end)
+        if text[pos] == '}':
+            return
+        pos = _skip(text, pos + 1)
+
+
+def _elements(text: str, pos: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) for each element of the array at pos"""
+    pos = _skip(text, pos)
+    if text[pos] != '[':
+        raise ValueError(f"Expected an array at offset {pos}")
+    pos = _skip(text, pos + 1)
+    if text[pos] == ']':
+        return
+    while True:
+        _, end = _decoder.raw_decode(text, pos)
+        yield pos, end
+        pos = _skip(text, end)
+        if text[pos] == ']':
+            return
+        pos = _skip(text, pos + 1)
+
+
+def build_index(raw: bytes) -> Dict:
+    """Byte ranges of each topic section and headline in a day file"""
+    # JSON syntax is ASCII and UTF-8 never reuses ASCII bytes inside multi-byte
+    # characters, so scanning the bytes as latin-1 keeps string offsets equal to
+    # byte offsets. Only keys are decoded for real, from their own bytes.
+    text = raw.decode('latin-1')
+    topics = {}
+    for key_start, key_end, value_start, value_end in _members(text, 0):
+        topic = json.loads(raw[key_start:key_end].decode('utf-8'))
+        entry = {"start": value_start, "end": value_end, "headlines": []}
+        for inner_start, inner_end, inner_value_start, _ in _members(text, value_start):
+            name = json.loads(raw[inner_start:inner_end].decode('utf-8'))
+            if name == "headlines":
+                entry["headlines"] = [list(span) for span in _elements(text, inner_value_start)]
+        topics[topic] = entry
+    return {"version": INDEX_VERSION, "topics": topics}
+
+
+class DayFile:
+    """Lazy per-topic and per-headline access to one day file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self._index = None
+
+    @property
+    def index(self) -> Dict:
+        if self._index is None:
+            self._index = self._load_index()
+        return self._index
+
+    def _load_index(self) -> Dict:
+        stat = os.stat(self.path)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if (index.get("version") == INDEX_VERSION and index.get("size") == stat.st_size
+                    and index.get("mtime_ns") == stat.st_mtime_ns):
+                return index
+        except (FileNotFoundError, ValueError):
+            pass
+        return self.build()
+
+    def build(self) -> Dict:
+        """(Re)build and save the sidecar index"""
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            index = build_index(f.read())
+        index["size"] = stat.st_size
+        index["mtime_ns"] = stat.st_mtime_ns
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+        self._index = index
+        return index
+
+    def _read(self, start: int, end: int):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return schemas.decode(f.read(end - start))
+
+    def topics(self) -> List[str]:
+        return list(self.index["topics"])
+
+    def headline_count(self, topic: str) -> int:
+        return len(self.index["topics"][topic]["headlines"])
+
+    def topic(self, topic: str) -> Optional[Dict]:
+        """One topic section ({"emoji", "headlines"}), or None if the day lacks it"""
+        entry = self.index["topics"].get(topic)
+        if entry is None:
+            return None
+        return self._read(entry["start"], entry["end"])
+
+    def headline(self, topic: str, position: int) -> Dict:
+        """One headline of a topic, by position"""
+        start, end = self.index["topics"][topic]["headlines"][position]
+        return self._read(start, end)
+
+    def iter_headlines(self, topic: str) -> Iterator[Dict]:
+        """Headlines of a topic, decoded one at a time"""
+        entry = self.index["topics"].get(topic)
+        if entry is None:
+            return
+        with open(self.path, 'rb') as f:
+            for start, end in entry["headlines"]:
+                f.seek(start)
+                yield schemas.decode(f.read(end - start))
+
+
+def day_paths(directory: str = PUBLIC_DATA_DIR, exported: bool = True) -> Dict[str, str]:
+    """Current file for every date: the exported content-hashed one, else YYYY-MM-DD.json.
+
+    With exported=False only the plain YYYY-MM-DD.json files are returned.
+    """
+    paths = {
+        os.path.basename(path)[:-len(".json")]: path
+        for path in glob.glob(os.path.join(directory, "????-??-??.json"))
+    }
+    if not exported:
+        return dict(sorted(paths.items()))
+    try:
+        with open(os.path.join(directory, EXPORT_INDEX_FILE), 'r', encoding='utf-8') as f:
+            exported = json.load(f).get("dates", {})
+    except (FileNotFoundError, ValueError):
+        exported = {}
+    for date, entry in exported.items():
+        paths[date] = os.path.join(directory, entry["file"])
+    return dict(sorted(paths.items()))
+
+
+def day_file(date: str, directory: str = PUBLIC_DATA_DIR) -> DayFile:
+    path = day_paths(directory).get(date)
+    if path is None:
+        raise FileNotFoundError(f"No day file for {date} in {directory}")
+    return DayFile(path)
+
+
+def index_directory(directory: str = PUBLIC_DATA_DIR) -> int:
+    """Build or refresh the sidecar for every current day file, returning how many were checked"""
+    paths = day_paths(directory)
+    for path in paths.values():
+        DayFile(path).index
+    return len(paths)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        print(schemas.encode(day_file(sys.argv[1]).topic(sys.argv[2]), pretty=True).decode('utf-8'))
+    else:
+        directory = sys.argv[1] if len(sys.argv) > 1 else PUBLIC_DATA_DIR
+        print(f"Indexed {index_directory(directory)} day files in {directory}")
@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 512
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against the exact ETag of the representation being served"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        # If-None-Match uses the weak comparison, which only ignores a W/ prefix
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_encoding(request: Request, encoding: str) -> bool:
+    """Check whether Accept-Encoding allows a content-coding"""
+    for part in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() == encoding and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            return True
+    return False
+
+
+def select_encoding(request: Request, available) -> str:
+    """Pick the best content-coding the client accepts, preferring brotli over gzip"""
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepts_encoding(request, encoding):
+            return encoding
+    return "identity"
+
+
+def cached_response(request: Request, body: bytes, media_type: str,
+                    headers: Optional[Dict[str, str]] = None) -> Response:
+    """Build a response with a strong ETag, gzip when accepted, and 304 on a match"""
+    etag = make_etag(body)
+    response_headers = {"Vary": "Accept-Encoding"}
+    if headers:
+        response_headers.update(headers)
+
+    use_gzip = len(body) >= GZIP_MIN_SIZE and accepts_encoding(request, 'gzip')
+    if use_gzip:
+        # Each content-coding is a different representation, so it gets its own strong ETag
+        response_headers["ETag"] = etag[:-1] + '-gzip"'
+    else:
+        response_headers["ETag"] = etag
+
+    if etag_matches(request, response_headers["ETag"]):
+        return Response(status_code=304, headers=response_headers)
+
+    if use_gzip:
+        body = gzip.compress(body, compresslevel=6)
+        response_headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=response_headers)
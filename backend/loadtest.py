@@ -0,0 +1,314 @@
+"""Load generator for the FastAPI server.
+
+Simulates a number of concurrent users, each sending its next request as soon
+as the previous one returns (plus an optional think time), against a weighted
+mix of the pages and the JSON API. With a ramp such as 1,5,10,25,50 it runs
+each step for --duration seconds and reports throughput, latency percentiles
+and the error rate, overall and per endpoint. The report ends with the
+largest step that met the latency and error targets, which is roughly how
+many concurrent users one main.py process can serve.
+
+--serve starts mock_services.py's feed server and Gemini stub plus a main.py
+server pointed at them, with its stores in a temporary directory, so a load
+test never touches real feeds, the real API or output/:
+
+    python loadtest.py --serve
+    python loadtest.py --url http://127.0.0.1:8000 --users 10,50,100 --duration 30
+    python loadtest.py --config my-loadtest.json --json results.json
+
+Settings come from loadtest.json next to this script (or --config), then the
+command line. In endpoint paths, {yesterday} is replaced by the date the
+pipeline fetches.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import config
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BACKEND_DIR, 'loadtest.json')
+
+DEFAULTS = {
+    "url": "http://127.0.0.1:8000",
+    "users": [1, 5, 10, 25, 50, 100],
+    "duration": 20.0,
+    "think_time": 0.0,
+    "timeout": 30.0,
+    "seed": 1,
+    "endpoints": [
+        {"path": "/", "weight": 1},
+        {"path": "/articles", "weight": 4},
+        {"path": "/api/latest", "weight": 2},
+        {"path": "/api/articles?date={yesterday}", "weight": 2},
+    ],
+    # A step passes when it stays within both targets
+    "slo": {"p99_ms": 1000, "error_rate": 0.01},
+    "stop_on_failure": True
+}
+
+SERVER_PORT = 8000
+SERVER_START_TIMEOUT = 120  # seconds for the server's first snapshot to be ready
+
+
+def load_config(path: Optional[str]) -> Dict:
+    settings = json.loads(json.dumps(DEFAULTS))
+    if path is None and os.path.exists(CONFIG_FILE):
+        path = CONFIG_FILE
+    if path is not None:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        slo = {**settings["slo"], **overrides.pop("slo", {})}
+        settings.update(overrides)
+        settings["slo"] = slo
+    return settings
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(p / 100 * len(ordered) + 0.5 - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class EndpointStats:
+    """Latencies and failures for one endpoint during one step"""
+
+    __slots__ = ("latencies", "errors", "statuses", "bytes")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+        self.bytes = 0
+
+    def add(self, status: str, seconds: float, size: int, ok: bool):
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes += size
+        if not ok:
+            self.errors += 1
+
+    def merge(self, other: "EndpointStats"):
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        self.bytes += other.bytes
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def summary(self, elapsed: float) -> Dict:
+        ordered = sorted(self.latencies)
+        requests = len(ordered)
+        return {
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "error_rate": self.errors / requests if requests else 0.0,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p90_ms": percentile(ordered, 90) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "mb_per_s": self.bytes / elapsed / 1e6 if elapsed else 0.0,
+            "statuses": dict(sorted(self.statuses.items()))
+        }
+
+
+async def run_step(settings: Dict, users: int) -> Dict:
+    """Run users concurrent users for the configured duration and summarize the step"""
+    import aiohttp
+
+    endpoints = settings["endpoints"]
+    # {yesterday} stands for the date the pipeline is fetching
+    paths = [endpoint["path"].replace("{yesterday}", config.get_yesterdays_date()) for endpoint in endpoints]
+    weights = [endpoint.get("weight", 1) for endpoint in endpoints]
+    stats = {path: EndpointStats() for path in paths}
+    base_url = settings["url"].rstrip('/')
+    timeout = aiohttp.ClientTimeout(total=settings["timeout"])
+    deadline = time.perf_counter() + settings["duration"]
+
+    async def user(number: int, session):
+        rng = random.Random(settings["seed"] * 100003 + number)
+        while time.perf_counter() < deadline:
+            path = rng.choices(paths, weights)[0]
+            start = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    body = await response.read()
+                status, size, ok = str(response.status), len(body), response.status < 400
+            except Exception as e:
+                status, size, ok = type(e).__name__, 0, False
+            stats[path].add(status, time.perf_counter() - start, size, ok)
+            if settings["think_time"]:
+                await asyncio.sleep(rng.expovariate(1 / settings["think_time"]))
+
+    # One connection per user, the way separate browsers would connect
+    connector = aiohttp.TCPConnector(limit=users, force_close=False)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(user(number, session) for number in range(users)))
+    elapsed = time.perf_counter() - started
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.merge(endpoint_stats)
+    result = {"users": users, "elapsed": elapsed, **total.summary(elapsed)}
+    result["endpoints"] = {path: endpoint_stats.summary(elapsed) for path, endpoint_stats in stats.items()}
+    slo = settings["slo"]
+    result["passed"] = (result["requests"] > 0 and result["p99_ms"] <= slo["p99_ms"]
+                        and result["error_rate"] <= slo["error_rate"])
+    return result
+
+
+def format_row(label: str, summary: Dict) -> str:
+    return (f"{label:<28} {summary['requests']:>8} {summary['rps']:>8.1f} {summary['error_rate'] * 100:>6.2f}% "
+            f"{summary['p50_ms']:>8.1f} {summary['p90_ms']:>8.1f} {summary['p99_ms']:>8.1f} {summary['max_ms']:>8.1f}")
+
+
+HEADER = (f"{'':<28} {'requests':>8} {'req/s':>8} {'errors':>7} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+
+def print_step(result: Dict):
+    verdict = "ok" if result["passed"] else "FAILED targets"
+    print(f"\n{result['users']} users, {result['elapsed']:.1f}s: {verdict}")
+    print(HEADER)
+    print(format_row("all", result))
+    for path, summary in result["endpoints"].items():
+        print(format_row(path[:28], summary))
+    failures = {status: count for status, count in result["statuses"].items()
+                if not (status.isdigit() and int(status) < 400)}
+    if failures:
+        print(f"failures: {failures}")
+
+
+async def run_load_test(settings: Dict) -> List[Dict]:
+    results = []
+    for users in settings["users"]:
+        result = await run_step(settings, users)
+        print_step(result)
+        results.append(result)
+        if not result["passed"] and settings["stop_on_failure"]:
+            break
+
+    passed = [result["users"] for result in results if result["passed"]]
+    slo = settings["slo"]
+    targets = f"p99 <= {slo['p99_ms']}ms and errors <= {slo['error_rate'] * 100:g}%"
+    if passed:
+        print(f"\nLargest step within targets ({targets}): {max(passed)} concurrent users")
+    else:
+        print(f"\nNo step met the targets ({targets})")
+    return results
+
+
+async def wait_for_server(url: str, process: subprocess.Popen, timeout: float = SERVER_START_TIMEOUT):
+    """Poll until the server answers /api/latest, which waits for its first snapshots"""
+    import aiohttp
+
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode}")
+            try:
+                async with session.get(url.rstrip('/') + "/api/latest") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+async def serve_and_run(settings: Dict, args) -> List[Dict]:
+    """Start the mock upstreams and a main.py server, run the load test against it, and stop both"""
+    import mock_services
+
+    runners = await mock_services.start_services(
+        feeds_port=args.feeds_port, gemini_port=args.gemini_port,
+        feed_delay=args.feed_delay, llm_delay=args.llm_delay
+    )
+    state_dir = tempfile.mkdtemp(prefix="curv-loadtest-")
+    env = dict(
+        os.environ,
+        FEEDS_BASE_URL=f"http://127.0.0.1:{args.feeds_port}",
+        GEMINI_API_ENDPOINT=f"http://127.0.0.1:{args.gemini_port}",
+        GEMINI_API_KEY="stub",
+        ARTICLES_DB=os.path.join(state_dir, "articles.db"),
+        SNAPSHOT_DB=os.path.join(state_dir, "snapshots.db"),
+        SEEN_DB=os.path.join(state_dir, "seen.db"),
+        TRACES_DIR=os.path.join(state_dir, "traces"),
+        RENDER_DIR=os.path.join(state_dir, "rendered"),
+        PROFILES_DIR=os.path.join(state_dir, "profiles"),
+    )
+    port = args.port
+    settings["url"] = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        await wait_for_server(settings["url"], process)
+        logging.info(f"Server ready at {settings['url']}")
+        return await run_load_test(settings)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for runner in runners:
+            await runner.cleanup()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the FastAPI server")
+    parser.add_argument("--config", help=f"JSON settings (default: {os.path.basename(CONFIG_FILE)} if present)")
+    parser.add_argument("--url", help="server to test")
+    parser.add_argument("--users", help="comma-separated concurrency steps, e.g. 1,10,50")
+    parser.add_argument("--duration", type=float, help="seconds per step")
+    parser.add_argument("--think-time", type=float, help="mean seconds a user waits between requests")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--serve", action="store_true",
+                        help="start the mock feeds, the Gemini stub and a main.py server to test")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="port for the --serve server")
+    parser.add_argument("--feeds-port", type=int, default=8901)
+    parser.add_argument("--gemini-port", type=int, default=8902)
+    parser.add_argument("--feed-delay", type=float, default=0.0, help="mock feed latency in seconds")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="Gemini stub latency in seconds")
+    args = parser.parse_args(argv)
+
+    settings = load_config(args.config)
+    if args.url:
+        settings["url"] = args.url
+    if args.users:
+        settings["users"] = [int(users) for users in args.users.split(",")]
+    if args.duration is not None:
+        settings["duration"] = args.duration
+    if args.think_time is not None:
+        settings["think_time"] = args.think_time
+
+    if args.serve:
+        results = asyncio.run(serve_and_run(settings, args))
+    else:
+        results = asyncio.run(run_load_test(settings))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+    return 0 if any(result["passed"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    config.setup_logging()
+    sys.exit(main())
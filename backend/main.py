@@ -1,13 +1,77 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import asyncio
-from run_all_fetchers import run_all_fetchers
-import os
+import config
+import metrics
+import profiling
+import schemas
+from run_all_fetchers import FETCHERS, TOPICS
+from singleflight import SingleFlight
+from snapshot_cache import SnapshotCache, get_snapshot_date
+from article_store import ArticleStore
+from http_cache import cached_response
+from rendered_pages import RenderedPages, snapshot_hash
+from datetime import datetime
+from typing import Optional
+import json
+import logging
+import threading
+
+config.setup_logging()
 
 app = FastAPI()
 
+# PROFILING_ENABLED=1 profiles each request into output/profiles
+if profiling.PROFILING_ENABLED:
+    profiling.add_request_profiling(app)
+
+# Indexed store over pipeline output for the JSON API, opened on first use
+# so importing this module creates no files
+_article_store: Optional[ArticleStore] = None
+_article_store_lock = threading.Lock()
+
+def get_article_store() -> ArticleStore:
+    global _article_store
+    with _article_store_lock:
+        if _article_store is None:
+            _article_store = ArticleStore()
+        return _article_store
+
+MAX_PAGE_SIZE = 200
+
+# Concurrent requests for the same date and topic share one fetcher run
+pipeline_runs = SingleFlight()
+
+async def run_topic(topic: str):
+    """Run one topic's fetcher and index its result for the JSON API.
+
+    Errors propagate so the snapshot cache keeps serving the previous result.
+    """
+    articles = await FETCHERS[topic]()
+    await asyncio.to_thread(lambda: get_article_store().upsert(articles))
+    return articles
+
+async def run_pipeline(topic: str):
+    """Run a topic's fetcher, joining any run already in flight for the same day"""
+    return await pipeline_runs.do((get_snapshot_date(), topic), run_topic, topic)
+
+# Latest completed result per topic, served immediately and refreshed in the background.
+# Topics are cached independently so a page costs only the topics it shows.
+snapshots = SnapshotCache(run_pipeline)
+
+@app.on_event("startup")
+async def start_snapshot_refresh():
+    snapshots.start(TOPICS)
+
+@app.on_event("shutdown")
+async def stop_snapshot_refresh():
+    await snapshots.stop()
+
+# Pages rendered and precompressed once per snapshot
+rendered_pages = RenderedPages()
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -18,32 +82,190 @@ templates = Jinja2Templates(directory="templates")
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+def format_topic_articles(topic_articles):
+    """Format one topic's articles for display"""
+    formatted = []
+    for article in topic_articles:
+        formatted.append({
+            "headline": article["headline"],
+            "date": article["date"],
+            "sources": article["sources"],
+            "text": article["text"],
+            "emoji": article["emoji"]
+        })
+    return formatted
+
+def render_topic_section(topic, topic_articles) -> str:
+    return templates.get_template("partials/topic_section.html").render(
+        topic=topic, articles=format_topic_articles(topic_articles)
+    )
+
+def parse_topics_param(topics: Optional[str]):
+    """Validate a comma-separated topics query parameter, defaulting to every topic"""
+    if not topics:
+        return list(TOPICS)
+    selected = []
+    for topic in topics.split(','):
+        topic = topic.strip().lower()
+        if topic not in FETCHERS:
+            raise HTTPException(status_code=400, detail=f"Unknown topic '{topic}'. Choose from: {', '.join(TOPICS)}")
+        if topic not in selected:
+            selected.append(topic)
+    return selected
+
+async def stream_topic_sections(topics):
+    """Yield each topic section as soon as its snapshot is available"""
+    async def get_topic(topic):
+        return topic, await snapshots.get(topic)
+
+    for finished in asyncio.as_completed([get_topic(topic) for topic in topics]):
+        try:
+            topic, snapshot = await finished
+        except Exception as e:
+            logging.error(f"Error streaming topic section: {str(e)}")
+            continue
+        yield render_topic_section(topic, snapshot.articles)
+
+async def stream_articles_page(sections):
+    yield templates.get_template("partials/articles_head.html").render()
+    async for section in sections:
+        yield section
+    yield templates.get_template("partials/articles_foot.html").render()
+
 @app.get("/articles", response_class=HTMLResponse)
-async def get_articles(request: Request):
-    # Run all fetchers
-    articles = await run_all_fetchers()
-    
-    # Format articles for display
-    formatted_articles = {}
-    for topic, topic_articles in articles.items():
-        formatted_articles[topic] = []
-        for article in topic_articles:
-            formatted_articles[topic].append({
-                "headline": article["headline"],
-                "date": article["date"],
-                "sources": article["sources"],
-                "text": article["text"],
-                "emoji": article["emoji"]
-            })
-    
-    return templates.TemplateResponse(
-        "articles.html",
-        {
-            "request": request,
-            "articles": formatted_articles
-        }
+async def get_articles(request: Request, topics: Optional[str] = None, stream: bool = False):
+    selected = parse_topics_param(topics)
+
+    if stream:
+        # Flush each topic section as it becomes available instead of waiting for the slowest one
+        return StreamingResponse(
+            stream_articles_page(stream_topic_sections(selected)),
+            media_type="text/html; charset=utf-8",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    # Serve the latest snapshot of each topic concurrently; only topics never fetched wait for a run
+    topic_snapshots = await asyncio.gather(*(snapshots.get(topic) for topic in selected))
+
+    def render() -> bytes:
+        # Format articles for display
+        formatted_articles = {}
+        for topic, snapshot in zip(selected, topic_snapshots):
+            formatted_articles[topic] = format_topic_articles(snapshot.articles)
+        return templates.get_template("articles.html").render(articles=formatted_articles).encode('utf-8')
+
+    page = await rendered_pages.get(snapshot_hash("html", topic_snapshots), ".html", render)
+    return rendered_pages.response(
+        request, page, "text/html; charset=utf-8", snapshots.headers(*topic_snapshots)
+    )
+
+@app.get("/api/latest")
+async def api_latest(request: Request, topics: Optional[str] = None):
+    """The current snapshot of each topic as JSON, precomputed once per snapshot"""
+    selected = parse_topics_param(topics)
+    topic_snapshots = await asyncio.gather(*(snapshots.get(topic) for topic in selected))
+
+    def render() -> bytes:
+        return schemas.encode({
+            topic: snapshot.articles for topic, snapshot in zip(selected, topic_snapshots)
+        })
+
+    page = await rendered_pages.get(snapshot_hash("json", topic_snapshots), ".json", render)
+    return rendered_pages.response(
+        request, page, "application/json", snapshots.headers(*topic_snapshots)
     )
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage pipeline timings for this worker in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def parse_date_param(name: str, value: Optional[str]) -> Optional[str]:
+    """Validate a YYYY-MM-DD query parameter"""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a date in YYYY-MM-DD format")
+
+@app.get("/api/articles")
+def api_articles(request: Request, date: Optional[str] = None, start: Optional[str] = None,
+                 end: Optional[str] = None, topic: Optional[str] = None,
+                 page: int = 1, page_size: int = 50):
+    """Articles for one date or an inclusive date range, optionally filtered by topic"""
+    date = parse_date_param("date", date)
+    start = parse_date_param("start", start)
+    end = parse_date_param("end", end)
+    if date:
+        start = end = date
+    if not start:
+        raise HTTPException(status_code=400, detail="Either date or start is required")
+    end = end or start
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    # Pick up any legacy output dumps added since the last request
+    article_store = get_article_store()
+    article_store.ingest_output_dir()
+    total, docs = article_store.query(start, end, topic, limit=page_size, offset=(page - 1) * page_size)
+
+    # Stored documents are already JSON, so splice them in rather than re-encoding
+    meta = json.dumps({
+        "start": start,
+        "end": end,
+        "topic": topic,
+        "page": page,
+        "page_size": page_size,
+        "total": total
+    }, ensure_ascii=False)
+    body = (meta[:-1] + ',"articles":[' + ','.join(docs) + ']}').encode('utf-8')
+    return cached_response(request, body, "application/json")
+
+@app.get("/api/search")
+def api_search(request: Request, q: str, topic: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, page: int = 1, page_size: int = 20):
+    """Full-text search over headlines and text, ranked by relevance"""
+    start = parse_date_param("start", start)
+    end = parse_date_param("end", end)
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    article_store = get_article_store()
+    article_store.ingest_output_dir()
+    try:
+        total, docs = article_store.search(q, topic, start, end, limit=page_size, offset=(page - 1) * page_size)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    meta = json.dumps({
+        "q": q,
+        "topic": topic,
+        "start": start,
+        "end": end,
+        "page": page,
+        "page_size": page_size,
+        "total": total
+    }, ensure_ascii=False)
+    body = (meta[:-1] + ',"articles":[' + ','.join(docs) + ']}').encode('utf-8')
+    return cached_response(request, body, "application/json")
+
+@app.get("/api/articles/{article_id}")
+def api_article(request: Request, article_id: str):
+    """A single article by its _id"""
+    article_store = get_article_store()
+    article_store.ingest_output_dir()
+    doc = article_store.get(article_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return cached_response(request, doc.encode('utf-8'), "application/json")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
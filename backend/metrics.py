@@ -0,0 +1,116 @@
+"""Per-stage pipeline timings in Prometheus text format.
+
+Each fetcher times its stages (fetch, parse, date_filter, seen_filter,
+interest_filter, dedupe, llm_rank, format) with `timed()`, labelled by topic
+and, where it applies, by feed. The server exposes the result at /metrics and CLI runs
+write it to output/metrics.prom. Each timed stage is also a span in the run's
+trace (see tracing.py).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+import tracing
+
+METRICS_FILE = os.path.join('output', 'metrics.prom')
+
+# Histogram buckets in seconds, from a parse of a small feed up to a slow LLM call
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_histograms: Dict[LabelKey, list] = {}  # labels -> [bucket counts..., sum, count]
+_counters: Dict[Tuple[str, LabelKey], float] = {}
+
+
+def _labels(stage: str, topic: str, feed: str = "") -> LabelKey:
+    labels = [("stage", stage)] if stage else []
+    labels.append(("topic", topic))
+    if feed:
+        labels.append(("feed", feed))
+    return tuple(labels)
+
+
+def observe(stage: str, topic: str, seconds: float, feed: str = ""):
+    """Record one duration for a stage"""
+    key = _labels(stage, topic, feed)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * len(STAGE_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+
+def count(name: str, topic: str, value: float = 1, stage: str = "", feed: str = ""):
+    """Add to a counter such as the number of items a stage produced"""
+    key = (name, _labels(stage, topic, feed))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def timed(stage: str, topic: str, feed: str = ""):
+    """Time the enclosed block as one run of stage (and a tracing span), counting it as an error if it raises"""
+    start = time.perf_counter()
+    with tracing.span(stage, topic=topic, feed=feed):
+        try:
+            yield
+        except BaseException:
+            count("curv_stage_errors_total", topic, stage=stage, feed=feed)
+            raise
+        finally:
+            observe(stage, topic, time.perf_counter() - start, feed)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = [
+        "# HELP curv_stage_duration_seconds Time spent in each pipeline stage.",
+        "# TYPE curv_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        histograms = {key: list(series) for key, series in _histograms.items()}
+        counters = dict(_counters)
+
+    for labels, series in sorted(histograms.items()):
+        for bound, bucket_count in zip(STAGE_BUCKETS, series):
+            lines.append(f"curv_stage_duration_seconds_bucket{_format_labels(labels, [('le', repr(bound))])} {bucket_count}")
+        lines.append(f"curv_stage_duration_seconds_bucket{_format_labels(labels, [('le', '+Inf')])} {series[-1]}")
+        lines.append(f"curv_stage_duration_seconds_sum{_format_labels(labels)} {series[-2]:.6f}")
+        lines.append(f"curv_stage_duration_seconds_count{_format_labels(labels)} {series[-1]}")
+
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        # repr round-trips exactly; :g would cut large counters to 6 significant digits
+        lines.append(f"{name}{_format_labels(labels)} {value if isinstance(value, int) else repr(float(value))}")
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path: str = METRICS_FILE):
+    """Write the current metrics to a file, for runs that have no /metrics endpoint"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
@@ -0,0 +1,145 @@
+"""Local stand-ins for the RSS feeds and the Gemini API.
+
+The feed server answers GET /<topic>/<n>.xml with an RSS document built from
+the recorded benchmark fixture, dated yesterday so the fetchers keep its
+entries. Each headline carries a keyword that the topic's interest filter
+looks for. The Gemini stub answers generateContent with the first five
+indices, the shape the fetchers ask for. Both can add latency to imitate
+slow upstreams.
+
+Point the backend at them with FEEDS_BASE_URL and GEMINI_API_ENDPOINT (see
+config.feed_urls and config.get_genai):
+
+    python mock_services.py --feed-delay 0.2 --llm-delay 1.5
+    FEEDS_BASE_URL=http://127.0.0.1:8901 GEMINI_API_ENDPOINT=http://127.0.0.1:8902 \\
+        GEMINI_API_KEY=stub python run_all_fetchers.py
+"""
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime, time, timezone
+from email.utils import format_datetime
+from typing import List
+
+from aiohttp import web
+
+import config
+from benchmarks import fixtures
+
+FEEDS_PORT = 8901
+GEMINI_PORT = 8902
+
+# A word each topic's is_article_interesting accepts, added to every mock headline
+TOPIC_KEYWORDS = {
+    "politics": "election",
+    "business": "merger",
+    "science": "discovery",
+    "tech": "software",
+    "sports": "championship",
+    "entertainment": "premiere"
+}
+
+
+def render_feed(topic: str, number: int, copies: int = 1) -> str:
+    """RSS document for one mock feed, with the recorded entries repeated copies times"""
+    yesterday = datetime.strptime(config.get_yesterdays_date(), '%Y-%m-%d').date()
+    keyword = TOPIC_KEYWORDS.get(topic, topic)
+    items = fixtures.recorded_items()
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>', '<rss version="2.0">', '<channel>',
+             f'<title>Mock {topic} feed {number}</title>', f'<link>http://mock.local/{topic}/{number}</link>']
+    for copy_number in range(copies):
+        for i, item in enumerate(items):
+            published = datetime.combine(yesterday, time(hour=8 + i % 12, minute=i), tzinfo=timezone.utc)
+            parts.append(
+                f"<item><title>{item['title']}: {keyword} {number}-{copy_number}</title>"
+                f"<link>http://mock.local/{topic}/{number}/{copy_number}/{i}</link>"
+                f"<description>{item['description']}</description>"
+                f"<pubDate>{format_datetime(published)}</pubDate></item>"
+            )
+    parts += ['</channel>', '</rss>']
+    return "\n".join(parts)
+
+
+def feeds_app(copies: int = 1, delay: float = 0.0) -> web.Application:
+    async def feed(request: web.Request) -> web.Response:
+        if delay:
+            await asyncio.sleep(delay)
+        number = request.match_info["number"]
+        if not number.isdigit():
+            raise web.HTTPNotFound()
+        return web.Response(text=render_feed(request.match_info["topic"], int(number), copies),
+                            content_type="application/rss+xml")
+
+    app = web.Application()
+    app.router.add_get("/{topic}/{number}.xml", feed)
+    return app
+
+
+def gemini_app(delay: float = 0.0) -> web.Application:
+    async def generate_content(request: web.Request) -> web.Response:
+        if not request.match_info["action"].endswith(":generateContent"):
+            raise web.HTTPNotFound()
+        await request.read()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({
+            "candidates": [{
+                "content": {"parts": [{"text": json.dumps([0, 1, 2, 3, 4])}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0}
+        })
+
+    app = web.Application()
+    app.router.add_post("/{version}/models/{action}", generate_content)
+    return app
+
+
+async def start(app: web.Application, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def start_services(host: str = "127.0.0.1", feeds_port: int = FEEDS_PORT, gemini_port: int = GEMINI_PORT,
+                         copies: int = 1, feed_delay: float = 0.0, llm_delay: float = 0.0) -> List[web.AppRunner]:
+    """Start both servers on the running loop; clean the returned runners up to stop them"""
+    return [
+        await start(feeds_app(copies, feed_delay), host, feeds_port),
+        await start(gemini_app(llm_delay), host, gemini_port)
+    ]
+
+
+async def serve(args):
+    runners = await start_services(args.host, args.feeds_port, args.gemini_port,
+                                   args.copies, args.feed_delay, args.llm_delay)
+    logging.info(f"Mock feeds on http://{args.host}:{args.feeds_port}, "
+                 f"Gemini stub on http://{args.host}:{args.gemini_port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mock RSS feeds and a Gemini API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--feeds-port", type=int, default=FEEDS_PORT)
+    parser.add_argument("--gemini-port", type=int, default=GEMINI_PORT)
+    parser.add_argument("--copies", type=int, default=1, help="times each feed repeats the recorded entries")
+    parser.add_argument("--feed-delay", type=float, default=0.0, help="seconds before each feed responds")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="seconds before each Gemini call responds")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    config.setup_logging()
+    main()
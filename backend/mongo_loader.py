@@ -0,0 +1,185 @@
+"""Sync pipeline output into the MongoDB articles collection the Next.js app reads.
+
+Articles are upserted on (date, topic, headline) with unordered bulk_write
+batches instead of one update_one round trip per article. Every document
+carries a content_hash of its content fields, and a batch first fetches the
+stored hashes for its keys, so unchanged articles are never sent. Comments,
+ratings and createdAt are only set on insert, so user activity survives
+re-syncs.
+
+The collection is injectable, so the loader runs against a real mongod or a
+mongomock stand-in:
+
+    python mongo_loader.py                      # latest pipeline run
+    python mongo_loader.py --run 20250413_003449_1234
+    python mongo_loader.py --store --start 2025-04-01 --end 2025-04-12
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import config
+
+MONGODB_DB = os.getenv('MONGODB_DB', 'test')
+MONGODB_COLLECTION = 'articles'
+BATCH_SIZE = int(os.getenv('MONGO_BATCH_SIZE', '1000'))
+
+INDEX_NAME = 'date_topic_headline'
+CONTENT_FIELDS = ("emoji", "text", "sources")
+
+
+def mongodb_configured() -> bool:
+    config.load_environment()
+    return bool(os.getenv('MONGODB_URI'))
+
+
+def get_collection(uri: Optional[str] = None, db: str = MONGODB_DB):
+    """The articles collection on the configured server"""
+    from pymongo import MongoClient
+
+    config.load_environment()
+    uri = uri or os.getenv('MONGODB_URI')
+    if not uri:
+        raise RuntimeError("MONGODB_URI is not set")
+    return MongoClient(uri)[db][MONGODB_COLLECTION]
+
+
+def ensure_indexes(collection):
+    """Unique key the loader upserts on"""
+    collection.create_index([("date", 1), ("topic", 1), ("headline", 1)], unique=True, name=INDEX_NAME)
+
+
+def content_hash(doc: Dict) -> str:
+    content = {field: doc.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def to_mongo_doc(article: Dict) -> Dict:
+    """The Article model's fields from a pipeline or generated article"""
+    doc = {
+        "date": article["date"],
+        "topic": config.frontend_topic(article["topic"]),
+        "headline": article["headline"],
+        "emoji": article.get("emoji", ""),
+        "text": article.get("text", ""),
+        "sources": list(article.get("sources", []))
+    }
+    doc["content_hash"] = content_hash(doc)
+    return doc
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _stored_hashes(collection, docs: List[Dict]) -> Dict:
+    dates = sorted({doc["date"] for doc in docs})
+    topics = sorted({doc["topic"] for doc in docs})
+    cursor = collection.find(
+        {"date": {"$in": dates}, "topic": {"$in": topics}, "headline": {"$in": [doc["headline"] for doc in docs]}},
+        {"_id": 0, "date": 1, "topic": 1, "headline": 1, "content_hash": 1}
+    )
+    return {(row["date"], row["topic"], row["headline"]): row.get("content_hash") for row in cursor}
+
+
+def load_articles(articles: Iterable[Dict], collection, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Upsert articles in unordered batches, skipping ones whose content is unchanged"""
+    from pymongo import UpdateOne
+
+    totals = {"upserted": 0, "modified": 0, "skipped": 0}
+    docs = (to_mongo_doc(article) for article in articles)
+    for batch in _batches(docs, batch_size):
+        # Later duplicates of a key within the batch win, as sequential upserts would
+        unique = {(doc["date"], doc["topic"], doc["headline"]): doc for doc in batch}
+        stored = _stored_hashes(collection, list(unique.values()))
+        now = datetime.now(timezone.utc)
+        operations = []
+        for key, doc in unique.items():
+            if stored.get(key) == doc["content_hash"]:
+                totals["skipped"] += 1
+                continue
+            date, topic, headline = key
+            operations.append(UpdateOne(
+                {"date": date, "topic": topic, "headline": headline},
+                {
+                    "$set": {**doc, "updatedAt": now},
+                    "$setOnInsert": {"comments": [], "ratings": [], "createdAt": now}
+                },
+                upsert=True
+            ))
+        if not operations:
+            continue
+        result = collection.bulk_write(operations, ordered=False)
+        totals["upserted"] += result.upserted_count
+        totals["modified"] += result.modified_count
+    return totals
+
+
+def run_articles(run_id: Optional[str] = None) -> Iterator[Dict]:
+    """Articles of a pipeline run, the latest completed one by default"""
+    from run_writer import iter_run_articles
+
+    return iter_run_articles(run_id)
+
+
+def sync_run(run_id: Optional[str] = None, collection=None) -> Dict[str, int]:
+    """Load one pipeline run into MongoDB"""
+    collection = collection if collection is not None else get_collection()
+    ensure_indexes(collection)
+    return load_articles(run_articles(run_id), collection)
+
+
+def store_articles(start: str, end: Optional[str] = None, page_size: int = BATCH_SIZE) -> Iterator[Dict]:
+    """Articles in the backend article store for a date range"""
+    from article_store import ArticleStore
+
+    store = ArticleStore()
+    try:
+        offset = 0
+        while True:
+            total, docs = store.query(start, end, limit=page_size, offset=offset)
+            for doc in docs:
+                yield json.loads(doc)
+            offset += len(docs)
+            if not docs or offset >= total:
+                break
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load pipeline output into MongoDB")
+    parser.add_argument("--run", help="pipeline run id (default: latest)")
+    parser.add_argument("--store", action="store_true", help="load from the article store instead of a run")
+    parser.add_argument("--start", help="first date for --store, YYYY-MM-DD")
+    parser.add_argument("--end", help="last date for --store, YYYY-MM-DD")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.store:
+        if not args.start:
+            parser.error("--store needs --start")
+        articles = store_articles(args.start, args.end)
+    else:
+        articles = run_articles(args.run)
+
+    collection = get_collection()
+    ensure_indexes(collection)
+    totals = load_articles(articles, collection, args.batch_size)
+    logging.info(f"Loaded articles into {collection.full_name}: {totals}")
+
+
+if __name__ == "__main__":
+    config.setup_logging()
+    main()
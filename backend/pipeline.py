@@ -0,0 +1,263 @@
+"""Streaming fetch-to-rank pipeline shared by the topic fetchers.
+
+A topic's feeds flow through stages joined by bounded asyncio queues:
+
+    fetch -> parse -> date_filter -> dedupe -> seen_filter -> interest_filter -> rank
+
+Each stage runs a pool of workers (PIPELINE_<STAGE>_WORKERS) that take one
+feed's batch from the queue before it, so the first feeds are parsed and
+filtered while later ones are still downloading. Queues hold at most
+PIPELINE_QUEUE_SIZE batches; a stage that falls behind makes the ones before
+it wait, so however many feeds a topic has, only a few downloaded documents
+and parsed feeds are in memory at a time. Parsing runs in worker threads to
+keep the event loop free for downloads.
+
+Dedupe runs ahead of the filters, as it did when every feed was gathered
+first: of the entries sharing a headline only the copy from the earliest
+feed in the list survives, and the headline is dropped if that copy is
+filtered out. Feeds finish in any order, so dedupe passes on every copy that
+is the earliest seen so far, and copies claimed later by an earlier feed are
+dropped when the candidates are collected. Ranking needs every candidate, so
+rank starts once all feeds have drained, with the candidates in feed order.
+
+    ranked = await pipeline.run("tech", urls, date, is_article_interesting, analyze_article_with_gemini)
+"""
+import asyncio
+import html
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+import metrics
+import seen_index
+import tracing
+from records import FeedArticle
+
+FEED_TIMEOUT = 10  # seconds
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '4'))
+
+# Workers per stage, overridden with PIPELINE_<STAGE>_WORKERS
+DEFAULT_WORKERS = {
+    "fetch": 16,
+    "parse": 2,
+    "date_filter": 2,
+    "seen_filter": 1,
+    "interest_filter": 2
+}
+
+# Sent by most fetchers so feeds that block bots still answer
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Timezone names seen in feed dates, for dateutil
+TZINFOS = {
+    "EDT": -14400,  # Eastern Daylight Time
+    "EST": -18000,  # Eastern Standard Time
+    "BST": 3600,    # British Summer Time
+    "GMT": 0,       # Greenwich Mean Time
+    "UTC": 0,       # Coordinated Universal Time
+    "PDT": -25200,  # Pacific Daylight Time
+    "PST": -28800   # Pacific Standard Time
+}
+
+# Tells a stage's workers that the stage before it has finished
+_DONE = object()
+
+
+def stage_workers(stage: str) -> int:
+    return max(1, int(os.getenv(f'PIPELINE_{stage.upper()}_WORKERS', DEFAULT_WORKERS[stage])))
+
+
+async def fetch_feed(session, topic: str, feed_url: str, headers: Optional[Dict] = None,
+                     verify_ssl: bool = True) -> Optional[str]:
+    """Download one feed, or None if it failed"""
+    try:
+        with metrics.timed("fetch", topic, feed_url):
+            # ssl=False skips certificate checks without building a context per feed
+            async with session.get(feed_url, timeout=FEED_TIMEOUT, headers=headers,
+                                   ssl=None if verify_ssl else False) as response:
+                if response.status != 200:
+                    logging.warning(f"Feed {feed_url} returned status {response.status}")
+                    return None
+                return await response.text()
+    except Exception as e:
+        logging.error(f"Error fetching from {feed_url}: {str(e)}")
+        return None
+
+
+def filter_by_date(entries, feed_url: str, date: str) -> List[FeedArticle]:
+    """Records for the parsed feed entries published on date"""
+    from dateutil.parser import parse
+
+    articles = []
+    sources = (feed_url,)  # shared by every record from this feed
+    for entry in entries:
+        date_field = entry.get('published', entry.get('updated', entry.get('pubDate')))
+        if not date_field:
+            continue
+
+        try:
+            article_date = parse(date_field, tzinfos=TZINFOS).strftime('%Y-%m-%d')
+        except Exception as e:
+            logging.debug(f"Error parsing date {date_field}: {str(e)}")
+            continue
+
+        if article_date == date:
+            # Clean and decode HTML entities
+            title = html.unescape(entry.get('title', '')).strip()
+            summary = html.unescape(entry.get('summary', '')).strip()
+            link = entry.get('link', '').strip()
+
+            articles.append(FeedArticle(title, date, summary, sources, link))
+    return articles
+
+
+class Candidates:
+    """Deduplicated candidates, kept in feed order whatever order feeds arrive in"""
+
+    def __init__(self):
+        self._feed_of: Dict[str, int] = {}  # headline -> earliest feed carrying it so far
+        self._by_feed: Dict[int, List[FeedArticle]] = {}
+
+    def claim(self, feed_index: int, articles: List[FeedArticle]) -> List[FeedArticle]:
+        """Dedupe one feed's entries, keeping those no earlier feed has claimed"""
+        feed_of = self._feed_of
+        kept = []
+        for article in articles:
+            headline = article.headline
+            # The copy from the earliest feed wins, as when feeds were merged in order
+            if headline and feed_of.get(headline, feed_index + 1) > feed_index:
+                feed_of[headline] = feed_index
+                kept.append(article)
+        return kept
+
+    def add(self, feed_index: int, articles: List[FeedArticle]):
+        """Collect claimed entries that passed the filters"""
+        self._by_feed.setdefault(feed_index, []).extend(articles)
+
+    def __len__(self) -> int:
+        return len(self._feed_of)
+
+    def articles(self) -> List[FeedArticle]:
+        feed_of = self._feed_of
+        return [
+            article
+            for feed_index in sorted(self._by_feed)
+            for article in self._by_feed[feed_index]
+            if feed_of[article.headline] == feed_index  # not claimed since by an earlier feed
+        ]
+
+
+async def _run_stage(handle: Callable, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                     workers: int, consumers: int):
+    """Run handle over inbox with a pool of workers, passing results that are not None on"""
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            result = await handle(*item)
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        for _ in range(consumers):
+            await outbox.put(_DONE)
+
+
+async def run(topic: str, feed_urls: List[str], date: str, is_interesting: Callable[[FeedArticle], bool],
+              rank: Callable[[List[FeedArticle]], List[FeedArticle]], headers: Optional[Dict] = None,
+              verify_ssl: bool = True) -> List[FeedArticle]:
+    """Stream a topic's feeds through every stage and return the ranked selection"""
+    import aiohttp
+    import feedparser
+
+    workers = {stage: stage_workers(stage) for stage in DEFAULT_WORKERS}
+    candidates = Candidates()
+    fetched = 0
+
+    async def parse(index, feed_url, content):
+        try:
+            with metrics.timed("parse", topic, feed_url):
+                feed = await asyncio.to_thread(feedparser.parse, content)
+        except Exception as e:
+            logging.error(f"Error parsing {feed_url}: {str(e)}")
+            return None
+        return index, feed_url, feed.entries
+
+    async def date_filter(index, feed_url, entries):
+        nonlocal fetched
+        with metrics.timed("date_filter", topic, feed_url):
+            articles = filter_by_date(entries, feed_url, date)
+        metrics.count("curv_stage_items_total", topic, len(articles), stage="date_filter", feed=feed_url)
+        logging.info(f"Found {len(articles)} articles from {feed_url}")
+        fetched += len(articles)
+        return (index, articles) if articles else None
+
+    async def dedupe(index, articles):
+        with metrics.timed("dedupe", topic):
+            articles = candidates.claim(index, articles)
+        return (index, articles) if articles else None
+
+    async def seen_filter(index, articles):
+        # Skip entries already seen on an earlier day
+        with metrics.timed("seen_filter", topic):
+            articles = await seen_index.filter_new(articles, date)
+        return (index, articles) if articles else None
+
+    async def interest_filter(index, articles):
+        with metrics.timed("interest_filter", topic):
+            articles = [article for article in articles if is_interesting(article)]
+        metrics.count("curv_stage_items_total", topic, len(articles), stage="interest_filter")
+        return (index, articles) if articles else None
+
+    async def collect(index, articles):
+        candidates.add(index, articles)
+
+    urls: asyncio.Queue = asyncio.Queue()
+    for index, feed_url in enumerate(feed_urls):
+        urls.put_nowait((index, feed_url))
+    for _ in range(workers["fetch"]):
+        urls.put_nowait(_DONE)
+
+    async with aiohttp.ClientSession(trace_configs=tracing.trace_configs()) as session:
+        async def fetch(index, feed_url):
+            content = await fetch_feed(session, topic, feed_url, headers, verify_ssl)
+            return None if content is None else (index, feed_url, content)
+
+        # (handle, workers) per stage, each reading the queue the one before it fills
+        stages = [
+            (fetch, workers["fetch"]),
+            (parse, workers["parse"]),
+            (date_filter, workers["date_filter"]),
+            (dedupe, 1),  # one consumer, so no two batches race over a headline
+            (seen_filter, workers["seen_filter"]),
+            (interest_filter, workers["interest_filter"]),
+            (collect, 1)
+        ]
+        queues = [urls] + [asyncio.Queue(maxsize=QUEUE_SIZE) for _ in stages[1:]] + [None]
+        tasks = [
+            asyncio.create_task(_run_stage(handle, queues[i], queues[i + 1], count,
+                                           stages[i + 1][1] if i + 1 < len(stages) else 0))
+            for i, (handle, count) in enumerate(stages)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A stage that failed would leave the others waiting on its queue forever
+            for task in tasks:
+                task.cancel()
+            raise
+
+    interesting_articles = candidates.articles()
+    logging.info(f"Found {fetched} articles dated {date}")
+    metrics.count("curv_stage_items_total", topic, len(interesting_articles), stage="llm_rank")
+    logging.info(f"Filtered to {len(interesting_articles)} interesting articles")
+
+    # Analyze all articles at once, off the event loop
+    with metrics.timed("llm_rank", topic):
+        return await asyncio.to_thread(rank, interesting_articles)
@@ -1,46 +1,26 @@
-import os
 import json
-import feedparser
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from dotenv import load_dotenv
-import google.generativeai as genai
-from dateutil.parser import parse
-import hashlib
+from typing import List, Dict
 import time
 import functools
 import asyncio
-import aiohttp
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import socket
 import logging
 import re
-import html
-import ssl
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini API
-api_key = os.getenv('GEMINI_API_KEY')
-if api_key:
-    genai.configure(api_key=api_key)
-    USE_GEMINI = True
-    logging.info("Gemini API configured successfully")
-else:
-    USE_GEMINI = False
-    logging.warning("GEMINI_API_KEY not found. Article analysis will be skipped.")
+import config
+import metrics
+import pipeline
+import seen_index
+import tracing
+from records import FeedArticle
+from config import get_yesterdays_date
 
 # Cache for API responses with TTL
 api_cache = {}
 CACHE_TTL = 3600  # 1 hour
 
+# Topic produced by this fetcher
+TOPIC = "politics"
+
 # Timeout settings
 FEED_TIMEOUT = 10  # seconds
 socket.setdefaulttimeout(FEED_TIMEOUT)
@@ -63,80 +43,8 @@ def cache_result(ttl_seconds=CACHE_TTL):
         return wrapper
     return decorator
 
-def get_yesterdays_date() -> str:
-    """Get yesterday's date in YYYY-MM-DD format"""
-    yesterday = datetime.now() - timedelta(days=1)
-    return yesterday.strftime('%Y-%m-%d')
-
-async def fetch_feed(session, feed_url: str, date: str) -> List[Dict]:
-    """Fetch a single RSS feed asynchronously"""
-    try:
-        # Add headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
-        
-        # Create SSL context that doesn't verify certificates
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        
-        async with session.get(feed_url, timeout=FEED_TIMEOUT, headers=headers, ssl=ssl_context) as response:
-            if response.status != 200:
-                logging.warning(f"Feed {feed_url} returned status {response.status}")
-                return []
-                
-            content = await response.text()
-            feed = feedparser.parse(content)
-            articles = []
-            
-            # Configure timezone info for common timezones
-            tzinfos = {
-                "EDT": -14400,  # Eastern Daylight Time
-                "EST": -18000,  # Eastern Standard Time
-                "BST": 3600,    # British Summer Time
-                "GMT": 0,       # Greenwich Mean Time
-                "UTC": 0,       # Coordinated Universal Time
-                "PDT": -25200,  # Pacific Daylight Time
-                "PST": -28800   # Pacific Standard Time
-            }
-            
-            for entry in feed.entries:
-                date_field = entry.get('published', entry.get('updated', entry.get('pubDate')))
-                if not date_field:
-                    continue
-                
-                try:
-                    article_date = parse(date_field, tzinfos=tzinfos).strftime('%Y-%m-%d')
-                except Exception as e:
-                    logging.debug(f"Error parsing date {date_field}: {str(e)}")
-                    continue
-                
-                if article_date == date:
-                    # Clean and decode HTML entities
-                    title = html.unescape(entry.get('title', '')).strip()
-                    summary = html.unescape(entry.get('summary', '')).strip()
-                    link = entry.get('link', '').strip()
-                    
-                    articles.append({
-                        'headline': title,
-                        'published_date': article_date,
-                        'text': summary,
-                        'sources': [feed_url],
-                        'url': link
-                    })
-            
-            logging.info(f"Found {len(articles)} articles from {feed_url}")
-            return articles
-            
-    except Exception as e:
-        logging.error(f"Error fetching from {feed_url}: {str(e)}")
-        return []
-
-async def fetch_all_feeds(date: str) -> List[Dict]:
-    """Fetch all RSS feeds concurrently"""
+def rss_feeds() -> List[str]:
+    """The feeds to fetch, unless overridden in the environment (see config.feed_urls)"""
     # Most reliable and fastest politics RSS feeds
     politics_rss_feeds = [
         # Major News Sources
@@ -156,27 +64,12 @@ async def fetch_all_feeds(date: str) -> List[Dict]:
         'https://www.euronews.com/rss?format=mrss&level=vertical&name=politics'
     ]
     
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_feed(session, feed_url, date) for feed_url in politics_rss_feeds]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        all_articles = []
-        seen_headlines = set()  # Track unique headlines
-        
-        for articles in results:
-            if isinstance(articles, list):  # Only add successful results
-                for article in articles:
-                    headline = article['headline']
-                    if headline and headline not in seen_headlines:
-                        seen_headlines.add(headline)
-                        all_articles.append(article)
-        
-        return all_articles
+    return config.feed_urls(TOPIC, politics_rss_feeds)
 
-def is_article_interesting(article: Dict) -> bool:
+def is_article_interesting(article: FeedArticle) -> bool:
     """Filter out uninteresting articles based on headline and content"""
-    headline = article['headline'].lower()
-    text = article.get('text', '').lower()
+    headline = article.headline.lower()
+    text = article.text.lower()
     
     # Immediate disqualifiers
     if not headline or len(headline) < 10:
@@ -229,18 +122,19 @@ def is_article_interesting(article: Dict) -> bool:
               for pattern in interesting_patterns)
 
 @cache_result(ttl_seconds=CACHE_TTL)
-def analyze_article_with_gemini(articles: List[Dict]) -> List[Dict]:
+def analyze_article_with_gemini(articles: List[FeedArticle]) -> List[FeedArticle]:
     """Use Gemini to analyze and rank articles"""
-    if not USE_GEMINI:
+    genai = config.get_genai()
+    if genai is None:
         # Sort by headline length as a basic heuristic
-        articles.sort(key=lambda x: len(x['headline']), reverse=True)
+        articles.sort(key=lambda x: len(x.headline), reverse=True)
         return articles[:5]
     
     try:
         model = genai.GenerativeModel('gemini-1.5-pro')
         
         # Extract headlines for analysis
-        headlines = [article['headline'] for article in articles]
+        headlines = [article.headline for article in articles]
         
         prompt = f"""
         Analyze these political headlines and select the 5 most important/impactful stories based on:
@@ -278,7 +172,7 @@ def analyze_article_with_gemini(articles: List[Dict]) -> List[Dict]:
             if not valid_indices:
                 print("No valid indices returned by Gemini")
                 # Sort by headline length as a fallback
-                articles.sort(key=lambda x: len(x['headline']), reverse=True)
+                articles.sort(key=lambda x: len(x.headline), reverse=True)
                 return articles[:5]
             
             return [articles[i] for i in valid_indices]
@@ -286,15 +180,16 @@ def analyze_article_with_gemini(articles: List[Dict]) -> List[Dict]:
         except Exception as e:
             print(f"Error parsing Gemini response: {str(e)}")
             # Sort by headline length as a fallback
-            articles.sort(key=lambda x: len(x['headline']), reverse=True)
+            articles.sort(key=lambda x: len(x.headline), reverse=True)
             return articles[:5]
             
     except Exception as e:
         print(f"Error using Gemini API: {str(e)}")
         # Sort by headline length as a fallback
-        articles.sort(key=lambda x: len(x['headline']), reverse=True)
+        articles.sort(key=lambda x: len(x.headline), reverse=True)
         return articles[:5]
 
+@tracing.traced("topic", topic=TOPIC)
 async def get_daily_politics_articles() -> List[Dict]:
     """Get politics articles from yesterday"""
     start_time = time.time()
@@ -303,50 +198,45 @@ async def get_daily_politics_articles() -> List[Dict]:
     date = get_yesterdays_date()
     logging.info(f"Fetching articles for {date}")
     
-    # Fetch articles from RSS feeds concurrently
-    articles = await fetch_all_feeds(date)
-    logging.info(f"Found {len(articles)} total articles")
-    
-    # Filter out duplicates and uninteresting articles
-    seen_headlines = set()
-    interesting_articles = []
-    for article in articles:
-        headline = article['headline']
-        if headline not in seen_headlines and is_article_interesting(article):
-            seen_headlines.add(headline)
-            interesting_articles.append(article)
-    
-    logging.info(f"Filtered to {len(interesting_articles)} interesting articles")
-    
-    # Analyze all articles with Gemini at once
-    analyzed_articles = analyze_article_with_gemini(interesting_articles)
+    # Stream the feeds through fetch, parse, filter and dedupe stages into the ranker
+    analyzed_articles = await pipeline.run(
+        TOPIC, rss_feeds(), date, is_article_interesting, analyze_article_with_gemini,
+        headers=pipeline.BROWSER_HEADERS, verify_ssl=False
+    )
     logging.info(f"Selected top {len(analyzed_articles)} articles")
     
     # Format the articles
-    formatted_articles = []
-    for article in analyzed_articles:
-        formatted_article = {
-            "_id": {"$oid": hashlib.md5((article['headline'] + article['published_date']).encode()).hexdigest()},
-            "topic": "politics",
-            "headline": article['headline'],
-            "date": article['published_date'],
-            "comments": [],
-            "emoji": "🏛️",
-            "ratings": [],
-            "sources": article['sources'],
-            "text": article['text']
-        }
-        formatted_articles.append(formatted_article)
+    with metrics.timed("format", TOPIC):
+        formatted_articles = []
+        for article in analyzed_articles:
+            formatted_article = {
+                "_id": {"$oid": seen_index.article_id(article)},
+                "topic": TOPIC,
+                "headline": article.headline,
+                "date": article.published_date,
+                "comments": [],
+                "emoji": "🏛️",
+                "ratings": [],
+                "sources": list(article.sources),
+                "text": article.text
+            }
+            formatted_articles.append(formatted_article)
     
     # Print execution time
     execution_time = time.time() - start_time
     logging.info(f"Total execution time: {execution_time:.2f} seconds")
+    metrics.observe("total", TOPIC, execution_time)
     
     return formatted_articles
 
 if __name__ == "__main__":
-    # Test the function with politics topic
-    articles = asyncio.run(get_daily_politics_articles())
+    import profiling
+    config.setup_logging()
+    
+    # Test the function with politics topic (--profile writes a profile to output/profiles)
+    with profiling.profiled(profiling.new_run_id(TOPIC)):
+        articles = asyncio.run(get_daily_politics_articles())
+    metrics.write_file()
     
     # Print results
     print(f"\nFound {len(articles)} politics articles from {get_yesterdays_date()}\n")
@@ -0,0 +1,190 @@
+"""Opt-in CPU and memory profiling for pipeline runs and server requests.
+
+Profiling is off unless PROFILING_ENABLED=1 is set or a CLI run is started
+with --profile:
+
+    python run_all_fetchers.py --profile
+    python tech_fetcher.py --profile
+    PROFILING_ENABLED=1 python main.py       # profiles each request
+
+`profiled(run_id)` wraps a run in pyinstrument's sampling profiler when it is
+installed (cProfile otherwise) and in tracemalloc, then writes
+<PROFILES_DIR>/<run_id>/ (output/profiles by default): profile.html and
+profile.txt from pyinstrument, or profile.pstats and profile.txt from
+cProfile, plus memory.txt with the peak traced memory and the top allocation
+sites, and summary.json.
+"""
+import cProfile
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from starlette.responses import Response
+
+PROFILES_DIR = os.getenv('PROFILES_DIR', os.path.join('output', 'profiles'))
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0') == '1'
+PROFILE_FLAG = '--profile'
+TRACEMALLOC_FRAMES = int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '1'))  # deeper tracebacks slow runs a lot
+TOP_STATS = 30  # lines in the text reports
+
+# Only one profiler can sample a process at a time
+_active = threading.Lock()
+_request_numbers = itertools.count(1)  # keeps request run ids within one second apart
+
+
+def requested(argv=None) -> bool:
+    """True when PROFILING_ENABLED=1 is set or --profile is on the command line"""
+    argv = sys.argv[1:] if argv is None else argv
+    return PROFILING_ENABLED or PROFILE_FLAG in argv
+
+
+def new_run_id(label: str = "") -> str:
+    """A run id in RunWriter's format, with an optional label such as the topic"""
+    run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    if label:
+        run_id += "_" + re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-')
+    return run_id
+
+
+class _Profiler:
+    """pyinstrument when it is installed, else cProfile"""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+        if Profiler is not None:
+            self.name = "pyinstrument"
+            self._profiler = Profiler(async_mode="enabled")
+        else:
+            self.name = "cProfile"
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.name == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.name == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def write(self, directory: str):
+        if self.name == "pyinstrument":
+            with open(os.path.join(directory, "profile.html"), 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+            text = self._profiler.output_text(unicode=True, color=False)
+        else:
+            self._profiler.dump_stats(os.path.join(directory, "profile.pstats"))
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(TOP_STATS)
+            text = stream.getvalue()
+        with open(os.path.join(directory, "profile.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def _memory_report(snapshot: tracemalloc.Snapshot, current: int, peak: int) -> str:
+    lines = [f"Traced memory: {current / 1024 / 1024:.1f} MiB current, {peak / 1024 / 1024:.1f} MiB peak", "",
+             f"Top {TOP_STATS} allocation sites still held at the end of the run:"]
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib.*"),
+        tracemalloc.Filter(False, "*/pyinstrument/*"),
+    ))
+    for stat in snapshot.statistics("lineno")[:TOP_STATS]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profiled(run_id: str, enabled: Optional[bool] = None, directory: str = PROFILES_DIR) -> Iterator[Optional[str]]:
+    """Profile the enclosed block when enabled (default: requested()), yielding the output directory"""
+    if enabled is None:
+        enabled = requested()
+    if not enabled or not _active.acquire(blocking=False):
+        yield None
+        return
+
+    output_dir = os.path.join(directory, run_id)
+    profiler = _Profiler()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    try:
+        if started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            yield output_dir
+        finally:
+            profiler.stop()
+            elapsed = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                profiler.write(output_dir)
+                with open(os.path.join(output_dir, "memory.txt"), 'w', encoding='utf-8') as f:
+                    f.write(_memory_report(snapshot, current, peak))
+                with open(os.path.join(output_dir, "summary.json"), 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "run_id": run_id,
+                        "profiler": profiler.name,
+                        "wall_seconds": round(elapsed, 3),
+                        "traced_memory_peak_bytes": peak
+                    }, f, indent=2)
+                logging.info(f"Profile for {run_id} written to {output_dir}")
+            except OSError as e:
+                logging.error(f"Error writing profile for {run_id}: {str(e)}")
+    finally:
+        _active.release()
+
+
+def add_request_profiling(app):
+    """Profile each HTTP request of a FastAPI app while PROFILING_ENABLED is set.
+
+    Requests that arrive while another is being profiled are served unprofiled,
+    since only one profiler can run at a time. A profiled response carries its
+    run id in X-Profile-Id. Streamed responses (no Content-Length) are passed
+    through as they are produced, so their profile ends when the response
+    starts rather than holding the whole stream back.
+    """
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        run_id = new_run_id(f"{request.method}_{request.url.path.strip('/') or 'index'}_{next(_request_numbers)}")
+        with profiled(run_id, enabled=True) as output_dir:
+            response = await call_next(request)
+            if output_dir is None:
+                return response
+            if "content-length" not in response.headers:
+                response.headers["X-Profile-Id"] = run_id
+                return response
+            # The body is produced after call_next returns; consume it inside the profile
+            chunks = [chunk async for chunk in response.body_iterator]
+        profiled_response = Response(
+            b"".join(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8') for chunk in chunks),
+            status_code=response.status_code
+        )
+        # Copy the raw list so repeated headers (Set-Cookie, Vary) all survive; the body is unchanged,
+        # so its Content-Length still holds
+        profiled_response.raw_headers = list(response.raw_headers)
+        profiled_response.headers["X-Profile-Id"] = run_id
+        return profiled_response
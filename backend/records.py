@@ -0,0 +1,51 @@
+"""Compact in-memory record for fetched articles.
+
+Feed entries travel through the pipeline's filter and dedupe stages and the
+ranker as `FeedArticle` records instead of dicts. A slotted record has no
+per-instance __dict__, and records from one feed share their date string and
+sources tuple, so large backfills and candidate pools cost a fraction of the
+memory. Records only become the JSON article schema when a fetcher formats
+its final selection.
+"""
+import sys
+from typing import Dict, Tuple
+
+
+class FeedArticle:
+    """One entry fetched from an RSS feed"""
+
+    __slots__ = ("headline", "published_date", "text", "sources", "url")
+
+    def __init__(self, headline: str, published_date: str, text: str, sources: Tuple[str, ...], url: str = ""):
+        self.headline = headline
+        self.published_date = sys.intern(published_date)
+        self.text = text
+        self.sources = sources
+        self.url = url
+
+    def __repr__(self) -> str:
+        # Used in cache keys (see cache_result), so it covers every field
+        return (f"FeedArticle(headline={self.headline!r}, published_date={self.published_date!r}, "
+                f"text={self.text!r}, sources={self.sources!r}, url={self.url!r})")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FeedArticle):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict:
+        """The dict shape fetchers used before records, for debugging and fixtures"""
+        return {
+            "headline": self.headline,
+            "published_date": self.published_date,
+            "text": self.text,
+            "sources": list(self.sources),
+            "url": self.url
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeedArticle":
+        return cls(data["headline"], data["published_date"], data.get("text", ""),
+                   tuple(data.get("sources", ())), data.get("url", ""))
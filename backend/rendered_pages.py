@@ -0,0 +1,143 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from http_cache import etag_matches, select_encoding
+from singleflight import SingleFlight
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Where rendered variants live; shared by every worker on the host
+RENDER_DIR = os.getenv('RENDER_DIR', os.path.join('output', 'rendered'))
+RENDER_CACHE_SIZE = 64  # variant sets kept in memory per process
+RENDER_RETENTION = 24 * 3600  # seconds before an unused rendered file is pruned
+RENDER_TOUCH_INTERVAL = RENDER_RETENTION // 2  # how often a served page's files get a fresh mtime
+
+ENCODING_SUFFIXES = {"identity": "", "gzip": ".gz", "br": ".br"}
+
+
+def snapshot_hash(kind: str, snapshots) -> str:
+    """Key a rendered page by what it shows and which snapshots it was built from"""
+    parts = [kind] + [f"{snapshot.key}:{snapshot.created_at!r}" for snapshot in snapshots]
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+class PageVariants:
+    """Files holding one rendered page in each available content-coding"""
+
+    def __init__(self, digest: str, etag: str, paths: Dict[str, str]):
+        self.digest = digest
+        self.etag = etag
+        self.paths = paths
+        self.touched = time.time()
+
+
+class RenderedPages:
+    """Render each page once per snapshot and keep precompressed copies on disk.
+
+    Serving a page is then a dictionary lookup and a file send; rendering and
+    compression only happen when a snapshot changes.
+    """
+
+    def __init__(self, directory: str = RENDER_DIR, cache_size: int = RENDER_CACHE_SIZE):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.pages: "OrderedDict[str, PageVariants]" = OrderedDict()
+        self.builds = SingleFlight()
+
+    def _write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _touch(self, paths):
+        # The mtime marks a file as in use for every worker's _prune
+        for path in paths:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def _prune(self):
+        """Delete files no worker has served within RENDER_RETENTION"""
+        cutoff = time.time() - RENDER_RETENTION
+        # Pages this process may still be sending are never deleted under it
+        in_use = set(self.pages)
+        for name in os.listdir(self.directory):
+            if name.split('.', 1)[0] in in_use:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _build(self, digest: str, extension: str, render: Callable[[], bytes]) -> PageVariants:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{digest}{extension}")
+        paths = {encoding: base + suffix for encoding, suffix in ENCODING_SUFFIXES.items()}
+        if brotli is None:
+            del paths["br"]
+
+        if all(os.path.exists(path) for path in paths.values()):
+            # Another worker already rendered this snapshot
+            self._touch(paths.values())
+            with open(paths["identity"], 'rb') as f:
+                body = f.read()
+        else:
+            body = render()
+            self._write(paths["identity"], body)
+            self._write(paths["gzip"], gzip.compress(body, compresslevel=9))
+            if brotli is not None:
+                self._write(paths["br"], brotli.compress(body, quality=11))
+            self._prune()
+            logging.info(f"Rendered {digest}{extension} ({len(body)} bytes)")
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return PageVariants(digest, etag, paths)
+
+    async def get(self, digest: str, extension: str, render: Callable[[], bytes]) -> PageVariants:
+        """Return the variants for digest, rendering them off the event loop on first use"""
+        page = self.pages.get(digest)
+        if page is not None and os.path.exists(page.paths["identity"]):
+            self.pages.move_to_end(digest)
+            if time.time() - page.touched > RENDER_TOUCH_INTERVAL:
+                # Keep a long-served page from looking unused to other workers' _prune
+                page.touched = time.time()
+                await asyncio.to_thread(self._touch, page.paths.values())
+            return page
+
+        page = await self.builds.do(digest, asyncio.to_thread, self._build, digest, extension, render)
+        self.pages[digest] = page
+        while len(self.pages) > self.cache_size:
+            self.pages.popitem(last=False)
+        return page
+
+    def response(self, request: Request, page: PageVariants, media_type: str,
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        """Send the variant matching Accept-Encoding, or 304 if the client already has it"""
+        encoding = select_encoding(request, list(page.paths))
+        response_headers = {"Vary": "Accept-Encoding"}
+        if headers:
+            response_headers.update(headers)
+        response_headers["ETag"] = page.etag if encoding == "identity" else page.etag[:-1] + f'-{encoding}"'
+
+        if etag_matches(request, response_headers["ETag"]):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return FileResponse(page.paths[encoding], media_type=media_type, headers=response_headers)
@@ -1,9 +1,14 @@
 import asyncio
-import json
-from datetime import datetime
 import logging
-import os
-from dotenv import load_dotenv
+import config
+import day_export
+import metrics
+import mongo_loader
+import tracing
+from article_store import ArticleStore
+from run_writer import RunWriter
+from snapshot_cache import publish_snapshot
+from snapshot_store import SnapshotStore
 from politics_fetcher import get_daily_politics_articles
 from business_fetcher import get_daily_business_articles
 from science_fetcher import get_daily_science_articles
@@ -11,18 +16,16 @@ from tech_fetcher import get_daily_tech_articles
 from sports_fetcher import get_daily_sports_articles
 from entertainment_fetcher import get_daily_entertainment_articles
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-# Load environment variables
-load_dotenv()
-
-# Check for GEMINI_API_KEY
-if not os.getenv('GEMINI_API_KEY'):
-    logging.warning("GEMINI_API_KEY not found. Articles will be ranked using basic heuristics.")
+# Fetcher for each topic produced by a full run, in output order
+FETCHERS = {
+    "politics": get_daily_politics_articles,
+    "business": get_daily_business_articles,
+    "science": get_daily_science_articles,
+    "tech": get_daily_tech_articles,
+    "sports": get_daily_sports_articles,
+    "entertainment": get_daily_entertainment_articles
+}
+TOPICS = list(FETCHERS)
 
 async def run_fetcher(fetcher_func, topic):
     """Run a single fetcher with error handling"""
@@ -34,42 +37,66 @@ async def run_fetcher(fetcher_func, topic):
         logging.error(f"Error fetching {topic} articles: {str(e)}")
         return []
 
-async def run_all_fetchers():
-    """Run all fetchers and save their output to JSON files"""
+async def run_all_fetchers(topics=None, run_id=None):
+    """Run all fetchers (or just the given topics) and save each topic's output as it finishes"""
+    writer = None
     try:
-        # Create tasks for each fetcher
-        tasks = [
-            run_fetcher(get_daily_politics_articles, "politics"),
-            run_fetcher(get_daily_business_articles, "business"),
-            run_fetcher(get_daily_science_articles, "science"),
-            run_fetcher(get_daily_tech_articles, "tech"),
-            run_fetcher(get_daily_sports_articles, "sports"),
-            run_fetcher(get_daily_entertainment_articles, "entertainment")
-        ]
-        
-        # Run all fetchers concurrently
-        results = await asyncio.gather(*tasks)
+        topics = list(topics or TOPICS)
+        writer = RunWriter(run_id)
+        store = ArticleStore()
+        snapshot_store = SnapshotStore()
+        all_articles = {}
         
-        # Create a dictionary to store all articles by topic
-        all_articles = {
-            "politics": results[0],
-            "business": results[1],
-            "science": results[2],
-            "tech": results[3],
-            "sports": results[4],
-            "entertainment": results[5]
-        }
+        async def run_topic(topic):
+            return topic, await run_fetcher(FETCHERS[topic], topic)
         
-        # Generate timestamp for filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with tracing.span("run", run_id=writer.run_id, topics=",".join(topics)):
+            # Run all fetchers concurrently, persisting each topic as soon as it
+            # finishes so a crash keeps every topic that completed
+            for finished in asyncio.as_completed([run_topic(topic) for topic in topics]):
+                topic, articles = await finished
+                all_articles[topic] = articles
+                
+                # Stream the topic to the run's JSONL output
+                await writer.write_topic(topic, articles)
+                
+                # Upsert into the article store; re-running a day rewrites only what changed
+                await asyncio.to_thread(store.upsert, articles)
+                
+                # Publish to the shared snapshot store so running servers pick it up.
+                # Empty results are usually failed fetches, so they don't replace a good snapshot.
+                if articles:
+                    try:
+                        publish_snapshot(topic, articles, store=snapshot_store)
+                    except Exception as e:
+                        logging.error(f"Error publishing {topic} snapshot: {str(e)}")
+            
+            await writer.finish()
+            
+            # Sync the run into MongoDB for the Next.js app when a server is configured
+            if mongo_loader.mongodb_configured():
+                try:
+                    with tracing.span("mongo_sync"):
+                        totals = await asyncio.to_thread(mongo_loader.sync_run, writer.run_id)
+                    logging.info(f"Synced run {writer.run_id} to MongoDB: {totals}")
+                except Exception as e:
+                    logging.error(f"Error syncing run to MongoDB: {str(e)}")
+            
+            # Export the run's dates to content-hashed public/data day files (EXPORT_DAY_FILES=1)
+            if day_export.EXPORT_DAY_FILES:
+                dates = {article["date"] for articles in all_articles.values() for article in articles}
+                try:
+                    with tracing.span("export"):
+                        await asyncio.to_thread(day_export.export_dates, dates, store)
+                except Exception as e:
+                    logging.error(f"Error exporting day files: {str(e)}")
         
-        # Create output directory if it doesn't exist
-        os.makedirs('output', exist_ok=True)
+        store.prune()
+        store.close()
+        snapshot_store.close()
         
-        # Save all articles to a single JSON file
-        output_file = f"output/articles_{timestamp}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_articles, f, ensure_ascii=False, indent=2)
+        # Keep topics in their usual order
+        all_articles = {topic: all_articles[topic] for topic in topics}
         
         # Print summary
         logging.info("\nSummary:")
@@ -80,13 +107,26 @@ async def run_all_fetchers():
             logging.info(f"Total {topic} articles: {article_count}")
         
         logging.info(f"\nTotal articles across all topics: {total_articles}")
-        logging.info(f"Articles saved to {output_file}")
+        logging.info(f"Articles saved to {store.path} and {writer.run_dir}")
         
         return all_articles
         
     except Exception as e:
         logging.error(f"Error running fetchers: {str(e)}")
+        if writer is not None:
+            await writer.finish("failed")
         raise
 
 if __name__ == "__main__":
-    asyncio.run(run_all_fetchers()) 
\ No newline at end of file
+    import profiling
+    config.setup_logging()
+    
+    # Check for GEMINI_API_KEY
+    if not config.use_gemini():
+        logging.warning("GEMINI_API_KEY not found. Articles will be ranked using basic heuristics.")
+    
+    # --profile (or PROFILING_ENABLED=1) writes a profile to output/profiles/<run_id>
+    run_id = profiling.new_run_id()
+    with profiling.profiled(run_id):
+        asyncio.run(run_all_fetchers(run_id=run_id))
+    metrics.write_file() 
\ No newline at end of file
@@ -3,29 +3,20 @@ from politics_fetcher import get_daily_politics_articles
 from business_fetcher import get_daily_business_articles
 from science_fetcher import get_daily_science_articles
 import logging
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+import config
 
 async def run_all_fetchers():
     """Run all fetchers and print their results"""
     try:
-        # Run politics fetcher
-        logging.info("Running politics fetcher...")
-        politics_articles = await get_daily_politics_articles()
+        # Run politics, business and science fetchers concurrently
+        logging.info("Running politics, business and science fetchers...")
+        politics_articles, business_articles, science_articles = await asyncio.gather(
+            get_daily_politics_articles(),
+            get_daily_business_articles(),
+            get_daily_science_articles()
+        )
         logging.info(f"Found {len(politics_articles)} politics articles")
-        
-        # Run business fetcher
-        logging.info("Running business fetcher...")
-        business_articles = await get_daily_business_articles()
         logging.info(f"Found {len(business_articles)} business articles")
-        
-        # Run science fetcher
-        logging.info("Running science fetcher...")
-        science_articles = await get_daily_science_articles()
         logging.info(f"Found {len(science_articles)} science articles")
         
         # Print summary
@@ -45,4 +36,5 @@ async def run_all_fetchers():
         raise
 
 if __name__ == "__main__":
+    config.setup_logging()
     asyncio.run(run_all_fetchers()) 
\ No newline at end of file
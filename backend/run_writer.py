@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import schemas
+
+# Per-run output: output/runs/<run_id>/<topic>.jsonl plus manifest.json
+RUNS_DIR = os.path.join('output', 'runs')
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+RUN_RETENTION = int(os.getenv('RUN_RETENTION', '20'))  # completed runs kept on disk
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+def _write_atomic(path: str, data: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RunWriter:
+    """Write each topic of a pipeline run to JSONL as soon as that topic finishes.
+
+    A topic's file is written to a temporary name and renamed into place, then
+    the manifest is rewritten atomically to list it, so readers only ever see
+    complete topic files and can read finished topics while the run continues.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, directory: str = RUNS_DIR):
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.directory = directory
+        self.run_dir = os.path.join(directory, self.run_id)
+        self._lock = threading.Lock()
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.manifest = {
+            "run_id": self.run_id,
+            "status": "running",
+            "started_at": time.time(),
+            "finished_at": None,
+            "topics": {}
+        }
+        self._write_manifest()
+
+    def _write_manifest(self):
+        _write_atomic(os.path.join(self.run_dir, MANIFEST_FILE), json.dumps(self.manifest, indent=2))
+
+    def _write_topic(self, topic: str, articles: List[Dict]):
+        name = f"{topic}.jsonl"
+        path = os.path.join(self.run_dir, name)
+        tmp_path = f"{path}.tmp"
+        digest = hashlib.sha256()
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            for article in articles:
+                line = schemas.encode(article) + b"\n"
+                digest.update(line)
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.manifest["topics"][topic] = {
+                "file": name,
+                "count": len(articles),
+                "sha256": digest.hexdigest(),
+                "finished_at": time.time()
+            }
+            self._write_manifest()
+
+    async def write_topic(self, topic: str, articles: List[Dict]):
+        """Publish one finished topic without blocking the event loop"""
+        await asyncio.to_thread(self._write_topic, topic, articles)
+
+    def _finish(self, status: str):
+        with self._lock:
+            self.manifest["status"] = status
+            self.manifest["finished_at"] = time.time()
+            self._write_manifest()
+        if status == "complete":
+            _write_atomic(os.path.join(self.directory, LATEST_FILE), self.run_id)
+            prune_runs(self.directory)
+
+    async def finish(self, status: str = "complete"):
+        """Mark the run complete (or failed) and point LATEST at it when complete"""
+        await asyncio.to_thread(self._finish, status)
+
+
+def prune_runs(directory: str = RUNS_DIR, keep: int = RUN_RETENTION):
+    """Delete all but the newest keep runs"""
+    runs = sorted(
+        name for name in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, name, MANIFEST_FILE))
+    )
+    for name in runs[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        logging.info(f"Pruned run {name}")
+
+
+def latest_run_id(directory: str = RUNS_DIR) -> Optional[str]:
+    """The id of the most recent completed run, if any"""
+    try:
+        with open(os.path.join(directory, LATEST_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(run_id: str, directory: str = RUNS_DIR) -> Dict:
+    with open(os.path.join(directory, run_id, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_run_articles(run_id: Optional[str] = None, topics: Optional[List[str]] = None,
+                      directory: str = RUNS_DIR) -> Iterator[Dict]:
+    """Yield articles from a run's finished topics, one line at a time"""
+    run_id = run_id or latest_run_id(directory)
+    if run_id is None:
+        return
+    manifest = read_manifest(run_id, directory)
+    for topic, entry in manifest["topics"].items():
+        if topics and topic not in topics:
+            continue
+        with open(os.path.join(directory, run_id, entry["file"]), 'rb') as f:
+            for line in f:
+                yield schemas.decode(line)
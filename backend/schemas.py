@@ -0,0 +1,169 @@
+"""Typed article schemas and the JSON encode/decode paths shared by the backend.
+
+The pipeline writer, the article store, the JSON API, the snapshot cache and
+the archive readers all serialize through `encode` and `decode` here. With
+msgspec installed they use its typed Structs and its encoder/decoder, which
+are several times faster than the stdlib json module. Without it, the same
+schemas are plain slotted dataclasses and the stdlib does the work, so the
+output is the same either way.
+
+`encode` is compact (no whitespace, UTF-8) for storage and the wire.
+`pretty=True` indents for humans.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+    class ObjectId(msgspec.Struct):
+        oid: str = msgspec.field(name="$oid")
+
+    class Article(msgspec.Struct):
+        """A formatted article, as stored and served"""
+        id: ObjectId = msgspec.field(name="_id")
+        topic: str = ""
+        headline: str = ""
+        date: str = ""
+        comments: List[Any] = msgspec.field(default_factory=list)
+        emoji: str = ""
+        ratings: List[Any] = msgspec.field(default_factory=list)
+        sources: List[str] = msgspec.field(default_factory=list)
+        text: str = ""
+
+    class Headline(msgspec.Struct):
+        """One headline in a public/data day file"""
+        headline: str
+        text: str = ""
+        sources: List[str] = msgspec.field(default_factory=list)
+
+    class DaySection(msgspec.Struct):
+        """One topic of a public/data day file"""
+        emoji: str = ""
+        headlines: List[Headline] = msgspec.field(default_factory=list)
+
+else:
+    @dataclass(slots=True)
+    class ObjectId:
+        oid: str
+
+    @dataclass(slots=True)
+    class Article:
+        """A formatted article, as stored and served"""
+        id: ObjectId
+        topic: str = ""
+        headline: str = ""
+        date: str = ""
+        comments: List[Any] = field(default_factory=list)
+        emoji: str = ""
+        ratings: List[Any] = field(default_factory=list)
+        sources: List[str] = field(default_factory=list)
+        text: str = ""
+
+    @dataclass(slots=True)
+    class Headline:
+        """One headline in a public/data day file"""
+        headline: str
+        text: str = ""
+        sources: List[str] = field(default_factory=list)
+
+    @dataclass(slots=True)
+    class DaySection:
+        """One topic of a public/data day file"""
+        emoji: str = ""
+        headlines: List[Headline] = field(default_factory=list)
+
+
+# A public/data day file: topic -> section
+Day = Dict[str, DaySection]
+
+# A legacy output/articles_*.json pipeline dump: topic -> articles
+ArticlesByTopic = Dict[str, List[Article]]
+
+
+def _article_to_builtins(article: Article) -> Dict:
+    return {
+        "_id": {"$oid": article.id.oid},
+        "topic": article.topic,
+        "headline": article.headline,
+        "date": article.date,
+        "comments": article.comments,
+        "emoji": article.emoji,
+        "ratings": article.ratings,
+        "sources": article.sources,
+        "text": article.text
+    }
+
+
+def _article_from_builtins(data: Dict) -> Article:
+    return Article(
+        ObjectId(data["_id"]["$oid"]), data.get("topic", ""), data.get("headline", ""), data.get("date", ""),
+        data.get("comments", []), data.get("emoji", ""), data.get("ratings", []),
+        data.get("sources", []), data.get("text", "")
+    )
+
+
+def _section_from_builtins(data: Dict) -> DaySection:
+    return DaySection(data.get("emoji", ""), [
+        Headline(item["headline"], item.get("text", ""), item.get("sources", []))
+        for item in data.get("headlines", [])
+    ])
+
+
+def to_builtins(obj: Any) -> Any:
+    """Dicts and lists for a schema object, for templates and other dict consumers"""
+    if msgspec is not None:
+        return msgspec.to_builtins(obj)
+    if isinstance(obj, Article):
+        return _article_to_builtins(obj)
+    if isinstance(obj, ObjectId):
+        return {"$oid": obj.oid}
+    if isinstance(obj, (Headline, DaySection)):
+        return {name: to_builtins(getattr(obj, name)) for name in obj.__slots__}
+    if isinstance(obj, dict):
+        return {key: to_builtins(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_builtins(value) for value in obj]
+    return obj
+
+
+if msgspec is not None:
+    _encoder = msgspec.json.Encoder()
+    _decoders: Dict[Any, "msgspec.json.Decoder"] = {}
+
+
+def encode(obj: Any, pretty: bool = False) -> bytes:
+    """JSON bytes for dicts, lists and schema objects; compact unless pretty"""
+    if msgspec is not None:
+        data = _encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=to_builtins).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=to_builtins).encode('utf-8')
+
+
+def decode(data, type: Any = Any) -> Any:
+    """Parse JSON, validating it into type (Article, List[Article], Day, ...) when given"""
+    if msgspec is not None:
+        decoder = _decoders.get(type)
+        if decoder is None:
+            decoder = _decoders[type] = msgspec.json.Decoder(type)
+        return decoder.decode(data)
+
+    obj = json.loads(data)
+    if type is Article:
+        return _article_from_builtins(obj)
+    if type == List[Article]:
+        return [_article_from_builtins(item) for item in obj]
+    if type is DaySection:
+        return _section_from_builtins(obj)
+    if type == Day:
+        return {topic: _section_from_builtins(section) for topic, section in obj.items()}
+    if type == ArticlesByTopic:
+        return {topic: [_article_from_builtins(item) for item in items] for topic, items in obj.items()}
+    return obj
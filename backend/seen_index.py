@@ -0,0 +1,191 @@
+"""Persistent index of articles the pipeline has already seen.
+
+Every fetched entry is keyed by its canonical URL and by a hash of its
+normalized headline and text, and the first date each key was seen is stored in
+SQLite. An in-memory Bloom filter in front of the table answers the common
+"never seen" case without a query. The fetchers drop entries first seen on an
+earlier day before filtering and ranking, and give each article an _id derived
+from its canonical URL, so a story carried over to the next day is neither
+processed nor stored twice.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from records import FeedArticle
+
+SEEN_DB = os.getenv('SEEN_DB', os.path.join('output', 'seen.db'))
+SEEN_INDEX_ENABLED = os.getenv('SEEN_INDEX_ENABLED', '1') != '0'
+
+# Bloom filter sizing: expected keys and target false-positive rate
+BLOOM_CAPACITY = int(os.getenv('SEEN_BLOOM_CAPACITY', '1000000'))
+BLOOM_ERROR_RATE = 0.001
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|cmpid|smid|at_medium|at_campaign)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    first_seen TEXT NOT NULL
+);
+"""
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so the same page from different feeds compares equal"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(name)
+    ))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def _normalize(value: str) -> str:
+    return ' '.join(re.sub(r'[^\w\s]', ' ', value.lower()).split())
+
+
+def content_hash(headline: str, text: str = '') -> str:
+    """Hash of a headline and text with case, punctuation and spacing normalized away"""
+    # The text is included so recurring headlines ("Morning Briefing") are not
+    # mistaken for the previous day's story
+    normalized = _normalize(headline) + '\n' + _normalize(text)
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def article_keys(article: FeedArticle) -> List[str]:
+    keys = [f"hash:{content_hash(article.headline, article.text)}"]
+    url = canonical_url(article.url)
+    if url:
+        keys.append(f"url:{url}")
+    return keys
+
+
+def article_id(article: FeedArticle) -> str:
+    """Stable _id for a fetched article: its canonical URL, else headline and date"""
+    url = canonical_url(article.url)
+    if url:
+        return hashlib.md5(url.encode()).hexdigest()
+    return hashlib.md5((article.headline + article.published_date).encode()).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIndex:
+    """Bloom filter in front of an exact SQLite table of seen keys"""
+
+    def __init__(self, path: str = SEEN_DB, capacity: int = BLOOM_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        self.bloom = BloomFilter(capacity)
+        self._loaded_rowid = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _catch_up(self):
+        # Other processes may have added keys since the filter was last filled
+        rows = self.conn.execute(
+            "SELECT rowid, key FROM seen WHERE rowid > ? ORDER BY rowid", (self._loaded_rowid,)
+        ).fetchall()
+        for rowid, key in rows:
+            self.bloom.add(key)
+            self._loaded_rowid = rowid
+
+    def _first_seen(self, keys: List[str]) -> Optional[str]:
+        candidates = [key for key in keys if key in self.bloom]
+        if not candidates:
+            return None
+        placeholders = ",".join("?" * len(candidates))
+        row = self.conn.execute(
+            f"SELECT MIN(first_seen) FROM seen WHERE key IN ({placeholders})", candidates
+        ).fetchone()
+        return row[0]
+
+    def filter_new(self, articles: Iterable[FeedArticle], date: str) -> List[FeedArticle]:
+        """Record articles as seen on date and return those not first seen on an earlier date"""
+        fresh = []
+        new_keys = []
+        with self._lock:
+            self._catch_up()
+            for article in articles:
+                keys = article_keys(article)
+                first_seen = self._first_seen(keys)
+                if first_seen is not None and first_seen < date:
+                    continue
+                fresh.append(article)
+                new_keys.extend((key, date) for key in keys)
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO seen (key, first_seen) VALUES (?, ?)", new_keys)
+            self._catch_up()
+        return fresh
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+
+_index: Optional[SeenIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SeenIndex:
+    """The process-wide index, opened on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SeenIndex()
+        return _index
+
+
+async def filter_new(articles: List[FeedArticle], date: str) -> List[FeedArticle]:
+    """Drop articles already seen on an earlier day, without blocking the event loop"""
+    if not SEEN_INDEX_ENABLED:
+        return articles
+    try:
+        return await asyncio.to_thread(lambda: get_index().filter_new(articles, date))
+    except (sqlite3.Error, OSError) as e:
+        # The index only saves work, so a broken one lets everything through
+        logging.error(f"Seen index unavailable, not filtering {len(articles)} articles: {str(e)}")
+        return articles
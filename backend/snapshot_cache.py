@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import schemas
+from config import get_yesterdays_date
+from singleflight import SingleFlight
+from snapshot_store import SnapshotStore
+
+# Snapshot freshness settings
+SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', '3600'))  # 1 hour
+SNAPSHOT_REFRESH_INTERVAL = int(os.getenv('SNAPSHOT_REFRESH_INTERVAL', '1800'))  # 30 minutes
+SNAPSHOT_LOCK_TTL = int(os.getenv('SNAPSHOT_LOCK_TTL', '300'))  # 5 minutes, renewed while a refresh runs
+SNAPSHOT_POLL_INTERVAL = 1  # seconds between checks while another process refreshes
+
+
+def get_snapshot_date() -> str:
+    """Get the date a fresh pipeline run would cover (yesterday) in YYYY-MM-DD format"""
+    return get_yesterdays_date()
+
+
+def publish_snapshot(key: str, articles: Any, date: Optional[str] = None,
+                     created_at: Optional[float] = None, store: Optional[SnapshotStore] = None):
+    """Publish a pipeline result so every running server serves it without its own run"""
+    store = store or SnapshotStore()
+    payload = schemas.encode(articles).decode('utf-8')
+    store.write(key, date or get_snapshot_date(), created_at or time.time(), payload)
+
+
+class Snapshot:
+    """One completed pipeline result and when it was produced.
+
+    An unpublished snapshot stands in for a key that has never produced a
+    result; it is served once but neither cached nor shared.
+    """
+
+    def __init__(self, key: str, date: str, created_at: float, articles: Dict[str, Any],
+                 published: bool = True):
+        self.key = key
+        self.date = date
+        self.created_at = created_at
+        self.articles = articles
+        self.published = published
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+    def is_stale(self, max_age: int = SNAPSHOT_MAX_AGE) -> bool:
+        return self.age >= max_age or self.date != get_snapshot_date()
+
+
+
+class SnapshotCache:
+    """Serve the latest pipeline snapshot immediately and refresh it in the background.
+
+    Snapshots are kept in memory and published through a SnapshotStore, so a
+    restarted server serves the previous result while the first refresh runs and
+    every worker process picks up a snapshot as soon as any one of them publishes it.
+    """
+
+    def __init__(self, loader: Callable[[str], Awaitable[Dict[str, Any]]],
+                 store: Optional[SnapshotStore] = None,
+                 max_age: int = SNAPSHOT_MAX_AGE,
+                 refresh_interval: int = SNAPSHOT_REFRESH_INTERVAL,
+                 lock_ttl: int = SNAPSHOT_LOCK_TTL):
+        self.loader = loader
+        self._store = store
+        self._store_lock = threading.Lock()
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.lock_ttl = lock_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.snapshots: Dict[str, Snapshot] = {}
+        self.runs = SingleFlight()
+        self._data_version = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._background = set()
+
+    @property
+    def store(self) -> SnapshotStore:
+        """The shared store, opened on first use so constructing a cache creates no files"""
+        with self._store_lock:
+            if self._store is None:
+                self._store = SnapshotStore()
+            return self._store
+
+    def load(self, key: str) -> Optional[Snapshot]:
+        """Load the published snapshot for key from the shared store, if there is one"""
+        try:
+            row = self.store.read(key)
+            if row is None:
+                return None
+            date, created_at, payload = row
+            snapshot = Snapshot(key, date, created_at, schemas.decode(payload))
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable snapshot {key}: {str(e)}")
+            return None
+        # Loads run in worker threads, so never replace a newer snapshot put meanwhile
+        current = self.snapshots.get(key)
+        if current is not None and current.created_at > snapshot.created_at:
+            return current
+        self.snapshots[key] = snapshot
+        return snapshot
+
+    def save(self, snapshot: Snapshot):
+        """Publish a snapshot to the shared store"""
+        publish_snapshot(snapshot.key, snapshot.articles, snapshot.date, snapshot.created_at, self.store)
+
+    def sync(self):
+        """Reload any snapshots another process has published since the last check"""
+        version = self.store.data_version()
+        if version == self._data_version:
+            return
+        self._data_version = version
+        for key, created_at in self.store.versions().items():
+            current = self.snapshots.get(key)
+            if current is None or created_at > current.created_at:
+                self.load(key)
+
+    def _peek(self, key: str) -> Optional[Snapshot]:
+        self.sync()
+        return self.snapshots.get(key) or self.load(key)
+
+    async def peek(self, key: str) -> Optional[Snapshot]:
+        """Return the snapshot for key from memory or the shared store without triggering a refresh"""
+        return await asyncio.to_thread(self._peek, key)
+
+    async def put(self, key: str, articles: Dict[str, Any], date: Optional[str] = None) -> Snapshot:
+        """Store a pipeline result produced outside the cache as the snapshot for key"""
+        snapshot = Snapshot(key, date or get_snapshot_date(), time.time(), articles)
+        self.snapshots[key] = snapshot
+        try:
+            await asyncio.to_thread(self.save, snapshot)
+        except Exception as e:
+            logging.error(f"Error saving snapshot {key}: {str(e)}")
+        return snapshot
+
+    async def _wait_for_other_refresh(self, key: str, since: float) -> Optional[Snapshot]:
+        """Wait while another process holds the refresh lease, returning what it publishes"""
+        while await asyncio.to_thread(self.store.is_locked, key):
+            await asyncio.sleep(SNAPSHOT_POLL_INTERVAL)
+            await asyncio.to_thread(self.sync)
+            snapshot = self.snapshots.get(key)
+            if snapshot is not None and snapshot.created_at > since:
+                return snapshot
+        return None
+
+    async def _hold_lease(self, key: str):
+        """Renew the refresh lease for key until cancelled, so a slow loader keeps it"""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            if not await asyncio.to_thread(self.store.acquire, key, self.owner, self.lock_ttl):
+                logging.warning(f"Lost the refresh lease for {key} to another process")
+                return
+
+    async def _run(self, key: str) -> Snapshot:
+        started = time.time()
+        while not await asyncio.to_thread(self.store.acquire, key, self.owner, self.lock_ttl):
+            # Another worker is already refreshing this key, so use its result
+            snapshot = await self._wait_for_other_refresh(key, started)
+            if snapshot is not None:
+                return snapshot
+
+        lease = asyncio.ensure_future(self._hold_lease(key))
+        try:
+            # Someone may have published while we were waiting for the lease
+            await asyncio.to_thread(self.sync)
+            snapshot = self.snapshots.get(key)
+            if snapshot is not None and snapshot.created_at > started:
+                return snapshot
+
+            date = get_snapshot_date()
+            articles = await self.loader(key)
+            if not articles:
+                # Empty results are usually failed fetches, so they don't replace a good snapshot
+                logging.warning(f"Refresh of {key} for {date} returned nothing; keeping the previous snapshot")
+                return self.snapshots.get(key) or Snapshot(key, date, time.time(), articles, published=False)
+            snapshot = await self.put(key, articles, date)
+            logging.info(f"Refreshed snapshot {key} for {date}")
+            return snapshot
+        finally:
+            lease.cancel()
+            await asyncio.to_thread(self.store.release, key, self.owner)
+
+    async def refresh(self, key: str) -> Snapshot:
+        """Produce a new snapshot for key, joining a refresh already in progress"""
+        return await self.runs.do(key, self._run, key)
+
+    def refresh_in_background(self, key: str):
+        """Start a refresh for key without waiting for it"""
+        if self.runs.in_flight(key):
+            return
+        task = asyncio.ensure_future(self.refresh(key))
+        self._background.add(task)
+        task.add_done_callback(self._finish_background)
+
+    def _finish_background(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Background snapshot refresh failed: {str(task.exception())}")
+
+    async def get(self, key: str) -> Snapshot:
+        """Return the current snapshot for key, revalidating it in the background when stale"""
+        snapshot = await self.peek(key)
+        if snapshot is None:
+            # Nothing to serve yet, so the first caller has to wait for a run
+            try:
+                return await self.refresh(key)
+            except Exception as e:
+                logging.error(f"Snapshot refresh for {key} failed: {str(e)}")
+                return Snapshot(key, get_snapshot_date(), time.time(), [], published=False)
+        if snapshot.is_stale(self.max_age):
+            self.refresh_in_background(key)
+        return snapshot
+
+    def headers(self, *snapshots: Snapshot) -> Dict[str, str]:
+        """Response headers describing how old the oldest of the served snapshots is"""
+        oldest = min(snapshots, key=lambda snapshot: snapshot.created_at)
+        published = all(snapshot.published for snapshot in snapshots)
+        stale = not published or any(snapshot.is_stale(self.max_age) for snapshot in snapshots)
+        # Caches subtract Age from max-age themselves, so max-age is the full lifetime.
+        # A page standing in for a failed first run must not be cached at all.
+        return {
+            "Age": str(int(oldest.age)),
+            "Cache-Control": f"public, max-age={self.max_age}, stale-while-revalidate={self.refresh_interval}"
+                             if published else "no-store",
+            "X-Snapshot-Date": min(snapshot.date for snapshot in snapshots),
+            "X-Snapshot-Created": datetime.fromtimestamp(oldest.created_at).isoformat(timespec='seconds'),
+            "X-Snapshot-Stale": "true" if stale else "false"
+        }
+
+    async def _refresh_scheduled(self, key: str):
+        try:
+            await self.refresh(key)
+        except Exception as e:
+            logging.error(f"Scheduled snapshot refresh for {key} failed: {str(e)}")
+
+    async def _schedule(self, keys):
+        while True:
+            await asyncio.to_thread(self.sync)
+            due = [
+                key for key in keys
+                if key not in self.snapshots
+                or self.snapshots[key].age >= self.refresh_interval
+                or self.snapshots[key].is_stale(self.max_age)
+            ]
+            # Keys refresh independently, so one slow key doesn't hold up the others
+            await asyncio.gather(*(self._refresh_scheduled(key) for key in due))
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self, keys):
+        """Start refreshing keys on a schedule, beginning with any already published"""
+        if self._scheduler is None:
+            self._scheduler = asyncio.ensure_future(self._schedule(list(keys)))
+
+    async def stop(self):
+        """Cancel the scheduler and any background refreshes"""
+        tasks = list(self._background)
+        if self._scheduler is not None:
+            tasks.append(self._scheduler)
+            self._scheduler = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
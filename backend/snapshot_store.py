@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Snapshot database shared by every server worker and by CLI runs
+SNAPSHOT_DB = os.getenv('SNAPSHOT_DB', os.path.join('output', 'snapshots.db'))
+SNAPSHOT_MMAP_SIZE = 256 * 1024 * 1024  # 256 MB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refresh_locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SnapshotStore:
+    """SQLite file that publishes snapshots to every process on the host.
+
+    Reads go through SQLite's memory-mapped I/O, PRAGMA data_version tells a
+    reader cheaply whether another process has published since it last looked,
+    and refresh_locks holds a lease so only one process refreshes a key at a time.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={SNAPSHOT_MMAP_SIZE}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def data_version(self) -> int:
+        """Counter that changes whenever another connection commits to the file"""
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def versions(self) -> Dict[str, float]:
+        """Creation time of every published snapshot, keyed by snapshot key"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT key, created_at FROM snapshots"))
+
+    def read(self, key: str) -> Optional[Tuple[str, float, str]]:
+        """Return (date, created_at, payload) for key, or None if nothing is published"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT date, created_at, payload FROM snapshots WHERE key = ?", (key,)
+            ).fetchone()
+
+    def write(self, key: str, date: str, created_at: float, payload: str):
+        """Publish a snapshot, replacing the previous one for key"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO snapshots (key, date, created_at, payload) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET date = excluded.date, "
+                "created_at = excluded.created_at, payload = excluded.payload",
+                (key, date, created_at, payload)
+            )
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the refresh lease for key unless another owner holds an unexpired one"""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO refresh_locks (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE refresh_locks.owner = excluded.owner OR refresh_locks.expires_at < ?",
+                (key, owner, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str):
+        """Give up the refresh lease for key if this owner still holds it"""
+        with self._lock:
+            self.conn.execute("DELETE FROM refresh_locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def is_locked(self, key: str) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT expires_at FROM refresh_locks WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] >= time.time()
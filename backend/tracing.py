@@ -0,0 +1,348 @@
+"""Structured tracing spans for the fetch-to-rank pipeline.
+
+A run is one trace: `run_all_fetchers` opens a "run" span, each
+get_daily_*_articles a "topic" span, and every `metrics.timed` stage (fetch,
+parse, date_filter, seen_filter, interest_filter, dedupe, llm_rank, format)
+a span of its own, labelled with its topic and feed. The aiohttp hooks from
+`aiohttp_trace_config()` add queued, dns, connect (TCP and TLS; aiohttp does
+not time them separately), request (until the response headers) and body
+child spans under each feed's fetch span. The current span travels in a
+contextvar, so tasks and to_thread workers nest under the span that started
+them.
+
+Spans are kept in memory until their trace's root span ends, then appended
+as JSON lines to output/traces/<date>.jsonl. The viewer prints a trace as a
+waterfall with the slowest feeds and the time spent in each stage:
+
+    python tracing.py                        # latest trace
+    python tracing.py --list                 # traces in the latest file
+    python tracing.py --trace <id> --min-ms 50
+"""
+import argparse
+import contextvars
+import functools
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+TRACES_DIR = os.getenv('TRACES_DIR', os.path.join('output', 'traces'))
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') != '0'
+TRACE_RETENTION_DAYS = int(os.getenv('TRACE_RETENTION_DAYS', '14'))  # daily trace files kept
+
+BAR_WIDTH = 40
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, start: Optional[float] = None, **attributes):
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.start = time.time() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = {key: value for key, value in attributes.items() if value not in (None, "")}
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": round(self.duration, 6),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+_lock = threading.Lock()
+_traces: Dict[str, List[Span]] = {}  # trace_id -> finished spans, while its root is open
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _export(spans: List[Span]):
+    """Append spans to today's trace file"""
+    os.makedirs(TRACES_DIR, exist_ok=True)
+    path = os.path.join(TRACES_DIR, f"{datetime.now().strftime('%Y-%m-%d')}.jsonl")
+    if not os.path.exists(path):
+        prune_traces()
+    lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans)
+    try:
+        with _lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    except OSError as e:
+        logging.warning(f"Could not write traces to {path}: {str(e)}")
+
+
+def prune_traces(directory: str = TRACES_DIR, keep: int = TRACE_RETENTION_DAYS):
+    """Delete all but the newest keep daily trace files"""
+    paths = sorted(glob.glob(os.path.join(directory, "????-??-??.jsonl")))
+    for path in paths[:-keep] if keep > 0 else []:
+        os.remove(path)
+
+
+def _start(span: Span):
+    if span.parent_id is None:
+        with _lock:
+            _traces[span.trace_id] = []
+
+
+def _finish(span: Span):
+    if span.end is None:
+        span.end = time.time()
+    with _lock:
+        spans = _traces.get(span.trace_id)
+        if spans is not None:
+            spans.append(span)
+        if span.parent_id is None:
+            spans = _traces.pop(span.trace_id, [])
+    # A root ends its trace; a span outliving its root is written on its own
+    if span.parent_id is None or spans is None:
+        _export(spans or [span])
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Run the enclosed block as a span, a child of the current span if there is one"""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = Span(name, _current_span.get(), **attributes)
+    _start(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current)
+
+
+def record(name: str, start: float, end: float, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+    """Add a span that has already happened, from start to end (time.time() seconds)"""
+    if not TRACING_ENABLED:
+        return None
+    finished = Span(name, parent or _current_span.get(), start, **attributes)
+    finished.end = end
+    _start(finished)
+    _finish(finished)
+    return finished
+
+
+def traced(name: str, **attributes):
+    """Decorator running an async function inside a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def aiohttp_trace_config():
+    """aiohttp TraceConfig adding connection, DNS, request and body spans under the current span"""
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.parent = _current_span.get()
+        ctx.start = time.time()
+        ctx.body = None
+
+    def phase_start(attribute):
+        async def hook(session, ctx, params):
+            setattr(ctx, attribute, time.time())
+        return hook
+
+    def phase_end(name, attribute):
+        async def hook(session, ctx, params):
+            started = getattr(ctx, attribute, None)
+            if started is not None:
+                record(name, started, time.time(), ctx.parent, host=getattr(params, "host", None))
+        return hook
+
+    async def on_connection_reuseconn(session, ctx, params):
+        if ctx.parent is not None:
+            ctx.parent.set(connection="reused")
+
+    async def on_dns_cache_hit(session, ctx, params):
+        if ctx.parent is not None:
+            ctx.parent.set(dns="cached")
+
+    async def on_request_end(session, ctx, params):
+        now = time.time()
+        record("request", ctx.start, now, ctx.parent, status=params.response.status)
+        # The body span stays open in the trace until its root ends; each chunk extends it
+        if TRACING_ENABLED:
+            ctx.body = Span("body", ctx.parent, now, bytes=0)
+            ctx.body.end = now
+            _start(ctx.body)
+            _finish(ctx.body)
+
+    async def on_response_chunk_received(session, ctx, params):
+        if ctx.body is not None:
+            ctx.body.end = time.time()
+            ctx.body.attributes["bytes"] += len(params.chunk)
+
+    async def on_request_exception(session, ctx, params):
+        failed = record("request", ctx.start, time.time(), ctx.parent)
+        if failed is not None:
+            failed.error = f"{type(params.exception).__name__}: {params.exception}"
+
+    config.on_request_start.append(on_request_start)
+    config.on_connection_queued_start.append(phase_start("queued_start"))
+    config.on_connection_queued_end.append(phase_end("queued", "queued_start"))
+    config.on_dns_resolvehost_start.append(phase_start("dns_start"))
+    config.on_dns_resolvehost_end.append(phase_end("dns", "dns_start"))
+    config.on_dns_cache_hit.append(on_dns_cache_hit)
+    config.on_connection_create_start.append(phase_start("connect_start"))
+    config.on_connection_create_end.append(phase_end("connect", "connect_start"))
+    config.on_connection_reuseconn.append(on_connection_reuseconn)
+    config.on_request_end.append(on_request_end)
+    config.on_response_chunk_received.append(on_response_chunk_received)
+    config.on_request_exception.append(on_request_exception)
+    return config
+
+
+def trace_configs() -> list:
+    """trace_configs argument for aiohttp.ClientSession: the tracing hooks, or none when disabled"""
+    return [aiohttp_trace_config()] if TRACING_ENABLED else []
+
+
+# Viewer
+
+def load_spans(path: str) -> Dict[str, List[Dict]]:
+    """trace_id -> spans, in file order"""
+    traces: Dict[str, List[Dict]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                traces.setdefault(item["trace_id"], []).append(item)
+    return traces
+
+
+def _label(item: Dict) -> str:
+    attributes = item["attributes"]
+    parts = [item["name"]]
+    for key in ("run_id", "topic", "feed", "host", "status"):
+        if key in attributes and not (key == "topic" and item["name"] not in ("run", "topic")):
+            parts.append(str(attributes[key]))
+    return " ".join(parts)
+
+
+def render_trace(spans: List[Dict], min_ms: float = 0.0) -> str:
+    """Waterfall of one trace: each span's offset and length as a bar under the trace's span"""
+    trace_start = min(item["start"] for item in spans)
+    trace_end = max(item["start"] + item["duration"] for item in spans)
+    total = max(trace_end - trace_start, 1e-9)
+    known = {item["span_id"] for item in spans}
+    children: Dict[Optional[str], List[Dict]] = {}
+    for item in spans:
+        parent = item["parent_id"] if item["parent_id"] in known else None
+        children.setdefault(parent, []).append(item)
+
+    lines = [f"trace {spans[0]['trace_id']}  {total:.3f}s  {len(spans)} spans"]
+
+    def walk(parent: Optional[str], depth: int):
+        for item in sorted(children.get(parent, []), key=lambda child: child["start"]):
+            if item["duration"] * 1000 < min_ms:
+                continue
+            offset = int((item["start"] - trace_start) / total * BAR_WIDTH)
+            length = max(1, int(item["duration"] / total * BAR_WIDTH))
+            bar = (" " * offset + "█" * length).ljust(BAR_WIDTH)[:BAR_WIDTH]
+            label = ("  " * depth + _label(item))[:60]
+            error = "  !" + item["error"] if item.get("error") else ""
+            lines.append(f"{label:<60} {item['duration'] * 1000:>9.1f}ms |{bar}|{error}")
+            walk(item["span_id"], depth + 1)
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def summarize(spans: List[Dict], top: int = 10) -> str:
+    """Slowest feeds and total time per stage"""
+    feeds: Dict[str, float] = {}
+    stages: Dict[str, List[float]] = {}
+    for item in spans:
+        stages.setdefault(item["name"], []).append(item["duration"])
+        feed = item["attributes"].get("feed")
+        if item["name"] == "fetch" and feed:
+            feeds[feed] = feeds.get(feed, 0.0) + item["duration"]
+
+    lines = ["", "Slowest feeds (fetch):"]
+    for feed, seconds in sorted(feeds.items(), key=lambda pair: pair[1], reverse=True)[:top]:
+        lines.append(f"  {seconds * 1000:>9.1f}ms  {feed}")
+    lines += ["", "Stages:", f"  {'stage':<16} {'count':>6} {'total':>11} {'max':>11}"]
+    for name, durations in sorted(stages.items(), key=lambda pair: sum(pair[1]), reverse=True):
+        lines.append(f"  {name:<16} {len(durations):>6} {sum(durations) * 1000:>9.1f}ms {max(durations) * 1000:>9.1f}ms")
+    return "\n".join(lines)
+
+
+def latest_trace_file(directory: str = TRACES_DIR) -> Optional[str]:
+    paths = sorted(glob.glob(os.path.join(directory, "????-??-??.jsonl")))
+    return paths[-1] if paths else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show pipeline traces")
+    parser.add_argument("file", nargs="?", help="trace file (default: the latest in output/traces)")
+    parser.add_argument("--trace", help="trace id, or a prefix of one (default: the latest trace)")
+    parser.add_argument("--list", action="store_true", help="list the traces in the file")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="hide spans shorter than this")
+    args = parser.parse_args(argv)
+
+    path = args.file or latest_trace_file()
+    if path is None:
+        parser.error(f"No trace files in {TRACES_DIR}")
+    traces = load_spans(path)
+    if not traces:
+        parser.error(f"No traces in {path}")
+
+    if args.list:
+        for trace_id, spans in traces.items():
+            root = min(spans, key=lambda item: item["start"])
+            started = datetime.fromtimestamp(root["start"]).strftime('%H:%M:%S')
+            duration = max(item["start"] + item["duration"] for item in spans) - root["start"]
+            print(f"{trace_id}  {started}  {duration:>8.3f}s  {len(spans):>5} spans  {_label(root)}")
+        return
+
+    if args.trace:
+        matches = [trace_id for trace_id in traces if trace_id.startswith(args.trace)]
+        if len(matches) != 1:
+            parser.error(f"{len(matches)} traces match '{args.trace}'")
+        spans = traces[matches[0]]
+    else:
+        spans = list(traces.values())[-1]
+    print(render_trace(spans, args.min_ms))
+    print(summarize(spans))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,16 @@
 import os
 import json
+import argparse
+import hashlib
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# MongoDB connection
-# MONGODB_URI = os.getenv('MONGODB_URI')
-# client = MongoClient(MONGODB_URI)
-# db = client['test']
-# articles_collection = db.articles
-
-# print('Connected to MongoDB database:', db.name)
-# print('Collections in database:', db.list_collection_names())
-
 # Base data structure for topics
 TOPICS_DATA = {
     'sports': {
@@ -44,33 +39,16 @@ TOPICS_DATA = {
     }
 }
 
-def ensure_data_directories():
-    """Create the necessary directory structure for data storage"""
-    # Get the root directory (one level up from scripts)
-    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir = os.path.join(root_dir, 'data')
-    
-    # Remove old data files if they exist
-    if os.path.exists(data_dir):
-        import shutil
-        shutil.rmtree(data_dir)
-    
-    # Create base data directory
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # Create topic directories
-    for topic in TOPICS_DATA.keys():
-        topic_dir = os.path.join(data_dir, topic)
-        os.makedirs(topic_dir, exist_ok=True)
-        
-        # Create daily subdirectories for April 6-13, 2024
-        start_date = datetime(2024, 4, 6)
-        end_date = datetime(2024, 4, 13)
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            os.makedirs(os.path.join(topic_dir, date_str), exist_ok=True)
-            current_date += timedelta(days=1)
+# Generated data lives at data/<topic>/<date>/articles.json in the repo root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+
+DEFAULT_START = '2024-04-06'
+DEFAULT_END = '2024-04-13'
+JOB_CHUNK_SIZE = 32  # (topic, date) jobs sent to a worker at a time
+
+def topic_file_path(topic, date_str):
+    return os.path.join(DATA_DIR, topic, date_str, 'articles.json')
 
 def generate_sample_articles(topic):
     """Generate sample articles for a given topic"""
@@ -164,77 +142,146 @@ def generate_sample_articles(topic):
         ]
     return []
 
+def render_topic_data(topic, date_str, articles):
+    """Serialize one topic's day file"""
+    return json.dumps({
+        'topic': topic,
+        'emoji': TOPICS_DATA[topic]['emoji'],
+        'date': date_str,
+        'articles': articles
+    }, indent=2, ensure_ascii=False).encode('utf-8')
+
+def file_hash(file_path):
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
 def save_topic_data(topic, date_str, articles):
-    """Save topic data to a JSON file"""
-    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(root_dir, 'data', topic, date_str, 'articles.json')
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump({
-            'topic': topic,
-            'emoji': TOPICS_DATA[topic]['emoji'],
-            'date': date_str,
-            'articles': articles
-        }, f, indent=2, ensure_ascii=False)
+    """Save topic data to a JSON file unless the file on disk already has the same content hash.
+
+    Returns whether the file was written.
+    """
+    data = render_topic_data(topic, date_str, articles)
+    file_path = topic_file_path(topic, date_str)
+    if hashlib.sha256(data).hexdigest() == file_hash(file_path):
+        return False
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+    return True
 
 def load_topic_data(topic, date_str):
     """Load topic data from a JSON file"""
     try:
-        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        file_path = os.path.join(root_dir, 'data', topic, date_str, 'articles.json')
+        file_path = topic_file_path(topic, date_str)
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         print(f"Warning: No data found for {topic} on {date_str}")
         return None
 
-def generate_daily_data(date_str):
-    """Generate and store daily articles for all topics"""
-    for topic in TOPICS_DATA.keys():
-        # Generate sample articles for this topic
-        articles = generate_sample_articles(topic)
-        
-        # Save to JSON file
-        save_topic_data(topic, date_str, articles)
-        
-        # Store in MongoDB
-        for article in articles:
-            article_doc = {
-                'date': date_str,
-                'topic': topic,
-                'emoji': TOPICS_DATA[topic]['emoji'],
-                'headline': article['headline'],
-                'text': article['text'],
-                'sources': article['sources'],
-                'comments': [],
-                'ratings': []
-            }
-            
-            articles_collection.update_one(
-                {
-                    'date': date_str,
-                    'topic': topic,
-                    'headline': article['headline']
-                },
-                {'$set': article_doc},
-                upsert=True
-        )
+def generate_topic_day(topic, date_str):
+    """Worker: generate and save one topic for one date"""
+    articles = generate_sample_articles(topic)
+    return topic, date_str, save_topic_data(topic, date_str, articles)
 
-def main():
-    # Create directory structure
-    ensure_data_directories()
-    
-    # Generate data for April 6-13, 2024
-    start_date = datetime(2024, 4, 6)
-    end_date = datetime(2024, 4, 13)
-    current_date = start_date
-    
+def date_range(start, end):
+    current_date = datetime.strptime(start, '%Y-%m-%d')
+    end_date = datetime.strptime(end, '%Y-%m-%d')
     while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        print(f'Generating data for {date_str}...')
-        generate_daily_data(date_str)
+        yield current_date.strftime('%Y-%m-%d')
         current_date += timedelta(days=1)
-    
+
+def store_in_mongodb(selected):
+    """Upsert the selected (topic, date) pairs; runs in the parent process only.
+
+    Every pair is passed, not just the files rewritten by this run, so a
+    database that missed an earlier run catches up. The loader skips
+    documents whose content hash is unchanged.
+    """
+    sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+    import mongo_loader
+
+    articles = (
+        {
+            'date': date_str,
+            'topic': topic,
+            'emoji': TOPICS_DATA[topic]['emoji'],
+            'headline': article['headline'],
+            'text': article['text'],
+            'sources': article['sources']
+        }
+        for topic, date_str in selected
+        for article in generate_sample_articles(topic)
+    )
+    collection = mongo_loader.get_collection()
+    mongo_loader.ensure_indexes(collection)
+    totals = mongo_loader.load_articles(articles, collection)
+    print(f'Stored in MongoDB: {totals}')
+
+def generate_data(start, end, topics, workers=None, clean=False):
+    """Generate every (topic, date) in the range across a process pool.
+
+    Files whose content hash already matches are left alone, so a re-run only
+    writes missing or changed dates. Returns the (topic, date) pairs written.
+    """
+    if clean and os.path.exists(DATA_DIR):
+        shutil.rmtree(DATA_DIR)
+
+    jobs = [(topic, date_str) for date_str in date_range(start, end) for topic in topics]
+    changed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            generate_topic_day,
+            [topic for topic, _ in jobs],
+            [date_str for _, date_str in jobs],
+            chunksize=JOB_CHUNK_SIZE
+        )
+        for topic, date_str, written in results:
+            if written:
+                changed.append((topic, date_str))
+
+    print(f'Wrote {len(changed)} of {len(jobs)} topic files ({len(jobs) - len(changed)} unchanged)')
+    return sorted(changed, key=lambda job: (job[1], job[0]))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate sample article data under data/')
+    parser.add_argument('--start', default=DEFAULT_START, help='first date, YYYY-MM-DD')
+    parser.add_argument('--end', help='last date, YYYY-MM-DD (defaults to --start, or the sample week)')
+    parser.add_argument('--topics', default=','.join(TOPICS_DATA), help='comma-separated topics')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--clean', action='store_true', help='delete data/ and regenerate everything')
+    parser.add_argument('--mongo', action='store_true',
+                        help='also upsert the selected dates into MongoDB (default: when MONGODB_URI is set)')
+    args = parser.parse_args(argv)
+
+    if args.end is None:
+        args.end = DEFAULT_END if args.start == DEFAULT_START else args.start
+    topics = [topic.strip() for topic in args.topics.split(',') if topic.strip()]
+    unknown = [topic for topic in topics if topic not in TOPICS_DATA]
+    if unknown:
+        parser.error(f"unknown topics: {', '.join(unknown)}")
+    args.topics = topics
+    if args.start > args.end:
+        parser.error('--start must not be after --end')
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f'Generating data for {args.start} to {args.end}...')
+    generate_data(args.start, args.end, args.topics, args.workers, args.clean)
+
+    if args.mongo or os.getenv('MONGODB_URI'):
+        store_in_mongodb([
+            (topic, date_str) for date_str in date_range(args.start, args.end) for topic in args.topics
+        ])
+
     print('Data generation complete!')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()